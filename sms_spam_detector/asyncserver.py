@@ -0,0 +1,195 @@
+import os
+import sys
+import json
+import asyncio
+import argparse
+import traceback
+from http import HTTPStatus
+from urllib.parse import parse_qs
+
+ROOT = os.path.dirname(__file__)
+sys.path.insert(0, ROOT)
+
+import webapp
+from sms_spam_detector.serving import MicroBatcher
+from sms_spam_detector import metrics
+
+# largest request body read into memory; bigger ones are answered with 413
+MAX_BODY = 16 << 20
+
+
+class NotTrained(Exception):
+    pass
+
+
+def score_batch(messages, model=None):
+    scored = webapp.predict_messages(messages, model)
+    if scored is None:
+        raise NotTrained()
+    return scored
+
+
+class AsyncApp:
+    """asyncio front end for webapp.py's routes.
+
+    Concurrent /predict calls are coalesced by a MicroBatcher, so under load
+    many requests share one vectorized scoring call; the model, HTML page
+    and training helpers are webapp.py's.
+    """
+    def __init__(self, max_batch=64, max_wait_ms=5.0):
+        self.batcher = MicroBatcher(score_batch, max_batch=max_batch, max_wait_ms=max_wait_ms)
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, path, version = lines[0].split(' ', 2)
+                except ValueError:
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        k, v = line.split(':', 1)
+                        headers[k.strip().lower()] = v.strip()
+                try:
+                    length = int(headers.get('content-length', 0))
+                except ValueError:
+                    length = -1
+                if not 0 <= length <= MAX_BODY:
+                    # do not read (or allocate) the body; the connection is dropped after this
+                    writer.write(self._response(413 if length > 0 else 400, 'text/plain', b'', False))
+                    await writer.drain()
+                    break
+                body = await reader.readexactly(length) if length else b''
+                t0 = metrics.clock()
+                try:
+                    status, ctype, payload = await self.route(method, path, body)
+                except Exception:
+                    # same answer as webapp.py, and the traceback still goes to stderr
+                    traceback.print_exc()
+                    status, ctype, payload = self._json(500, {'error': 'internal server error'})
+                metrics.observe_request(webapp.route_label(path), status, t0)
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                writer.write(self._response(status, ctype, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def _response(self, status, ctype, payload, keep_alive):
+        status = HTTPStatus(status)
+        head = [
+            f'HTTP/1.1 {status.value} {status.phrase}',
+            f'Content-Type: {ctype}',
+            f'Content-Length: {len(payload)}',
+            'Connection: ' + ('keep-alive' if keep_alive else 'close'),
+        ]
+        return ('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + payload
+
+    def _json(self, status, data):
+        return status, 'application/json', json.dumps(data).encode('utf-8')
+
+    async def route(self, method, path, body):
+        loop = asyncio.get_running_loop()
+        if method == 'GET':
+            if path == '/metrics':
+                return 200, 'text/plain; version=0.0.4; charset=utf-8', metrics.REGISTRY.render().encode('utf-8')
+            if path.startswith('/api/status'):
+                # may stat, reload and compile the model: keep it off the event loop
+                return self._json(200, await loop.run_in_executor(None, webapp.status_data))
+            return 200, 'text/html; charset=utf-8', webapp.HTML_PAGE.encode('utf-8')
+        if method != 'POST':
+            return 405, 'text/plain', b''
+        text = body.decode('utf-8')
+        full_path, path = path, path.split('?', 1)[0]
+        if path == '/predict':
+            params = parse_qs(text)
+            message = params.get('message', [''])[0]
+            name = webapp.model_name(full_path, params)
+            if name and name not in webapp.MODELS:
+                return self._json(404, {'error': f'unknown model {name}'})
+            try:
+                if name:
+                    # named models are not micro-batched; the batcher scores with the default one
+                    (pred, probs), = await loop.run_in_executor(None, score_batch, [message], name)
+                else:
+                    pred, probs = await self.batcher.submit(message)
+            except NotTrained:
+                return self._json(400, {'error': 'model not trained yet'})
+            return self._json(200, {'message': message, 'predicted': pred, 'probs': probs})
+        if path == '/api/predict_batch':
+            try:
+                ids, messages = webapp.parse_batch(json.loads(text))
+            except ValueError as e:
+                return self._json(400, {'error': str(e)})
+            name = webapp.model_name(full_path)
+            if name and name not in webapp.MODELS:
+                return self._json(404, {'error': f'unknown model {name}'})
+            try:
+                scored = await loop.run_in_executor(None, score_batch, messages, name)
+            except NotTrained:
+                return self._json(400, {'error': 'model not trained yet'})
+            return self._json(200, {'results': webapp.batch_results(ids, scored)})
+        if path == '/train':
+            n = int(parse_qs(text).get('n', ['20'])[0])
+            job, started = webapp.start_training(n)
+            return self._json(202 if started else 409, {'job': job})
+        if path == '/clear':
+            await loop.run_in_executor(None, webapp.clear_model)
+            return 200, 'text/plain', b''
+        return 404, 'text/plain', b''
+
+
+async def serve(host, port, max_batch, max_wait_ms):
+    app = AsyncApp(max_batch=max_batch, max_wait_ms=max_wait_ms)
+    app.batcher.start()
+    webapp.load_model()
+    server = await asyncio.start_server(app.handle_connection, host, port)
+    print(f'Serving on http://localhost:{port} - open in your browser')
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max-batch', type=int, default=64, help='most /predict calls scored together')
+    parser.add_argument('--max-wait-ms', type=float, default=5.0,
+                        help='longest a /predict call waits for others to join its batch')
+    parser.add_argument('--cache-size', type=int, default=webapp.CACHE.max_size,
+                        help='prediction cache entries (0 disables the cache)')
+    parser.add_argument('--cache-ttl', type=float, default=None, help='seconds a cached prediction stays valid')
+    parser.add_argument('--metrics', action='store_true',
+                        help='record per-stage and per-request latency histograms for /metrics')
+    parser.add_argument('--models', nargs='+', default=[], metavar='NAME=PATH',
+                        help='extra models to serve as /predict?model=NAME')
+    parser.add_argument('--max-models', type=int, default=webapp.MODELS.max_resident,
+                        help='most extra models kept loaded at once')
+    args = parser.parse_args()
+    try:
+        for name, path in webapp.parse_models(args.models).items():
+            webapp.MODELS.add(name, os.path.abspath(path))
+    except ValueError as e:
+        parser.error(str(e))
+    webapp.MODELS.max_resident = args.max_models
+    webapp.CACHE.max_size = args.cache_size
+    webapp.CACHE.ttl = args.cache_ttl
+    metrics.enable(args.metrics)
+    webapp.JOBS.forget()
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_batch, args.max_wait_ms))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+import os
+import sys
+import json
+import time
+import copy
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+import tracemalloc
+import http.client
+from urllib.parse import urlencode
+from http.server import ThreadingHTTPServer
+from sms_spam_detector.model import SimpleCountVectorizer, HashingVectorizer, MultinomialNB, save_pipeline, load_pipeline
+from sms_spam_detector.serving import ModelHolder
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; only reported in the output
+    np = None
+
+
+def make_corpus(n, vocab_size=5000, seed=0, spam_ratio=0.15, min_words=4, max_words=30):
+    """Generate n synthetic (texts, labels) SMS messages.
+
+    Words follow a Zipf-like distribution over a random vocabulary of
+    vocab_size words; spam messages draw a third of their words from a
+    smaller spam-heavy slice of it, so the classes are learnable.
+    """
+    rng = random.Random(seed)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    vocab = sorted({''.join(rng.choice(letters) for _ in range(rng.randint(2, 9)))
+                    for _ in range(vocab_size)})
+    rng.shuffle(vocab)
+    weights = [1.0 / (rank + 1) for rank in range(len(vocab))]
+    spam_words = vocab[len(vocab) // 2:len(vocab) // 2 + max(10, len(vocab) // 50)]
+    texts = []
+    labels = []
+    for _ in range(n):
+        spam = rng.random() < spam_ratio
+        k = rng.randint(min_words, max_words)
+        words = rng.choices(vocab, weights=weights, k=k)
+        if spam:
+            for i in range(0, k, 3):
+                words[i] = rng.choice(spam_words)
+            words.append(rng.choice(['FREE!', 'WIN', 'Call 08001234567', '£1000', 'txt STOP']))
+        texts.append(' '.join(words))
+        labels.append('spam' if spam else 'ham')
+    return texts, labels
+
+
+def summarize(samples, items=1):
+    """Latency percentiles (ms) over per-call samples and items/second throughput."""
+    ordered = sorted(samples)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))] * 1000.0
+
+    total = sum(ordered)
+    return {
+        'calls': len(ordered),
+        'items_per_call': items,
+        'mean_ms': total / len(ordered) * 1000.0,
+        'p50_ms': pct(50),
+        'p90_ms': pct(90),
+        'p99_ms': pct(99),
+        'max_ms': ordered[-1] * 1000.0,
+        'throughput_per_s': len(ordered) * items / total if total else None,
+    }
+
+
+def peak_memory(fn):
+    """Peak bytes allocated by Python while running fn once (via tracemalloc)."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench(fn, repeat, items=1, memory=True):
+    # timing runs are kept separate from the traced run: tracemalloc slows
+    # allocation-heavy code down a lot
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    result = summarize(samples, items)
+    if memory:
+        result['peak_memory_bytes'] = peak_memory(fn)
+    return result
+
+
+def bench_each(fn, args):
+    """Time fn(a) once per a, for per-call latency of single-message paths."""
+    samples = []
+    for a in args:
+        t0 = time.perf_counter()
+        fn(a)
+        samples.append(time.perf_counter() - t0)
+    return summarize(samples)
+
+
+def make_vectorizer(hash_bits):
+    return HashingVectorizer(n_bits=hash_bits) if hash_bits else SimpleCountVectorizer()
+
+
+def run_core(texts, labels, queries, args):
+    results = {}
+    vec = make_vectorizer(args.hash_bits)
+    results['tokenize'] = bench_each(vec._tokenize, queries)
+    results['vectorizer.fit'] = bench(lambda: make_vectorizer(args.hash_bits).fit(texts), args.repeat, len(texts))
+    vec.fit(texts)
+    results['vectorizer.transform'] = bench(lambda: vec.transform_csr(texts), args.repeat, len(texts))
+    X = vec.transform_csr(texts)
+    results['nb.fit'] = bench(lambda: MultinomialNB().fit(X, labels), args.repeat, len(texts))
+    clf = MultinomialNB().fit(X, labels)
+    Xq = vec.transform_csr(queries)
+    results['nb.predict'] = bench(lambda: clf.predict(Xq), args.repeat, len(queries))
+    results['nb.predict_proba'] = bench(lambda: clf.predict_proba(Xq), args.repeat, len(queries))
+    results['predict_proba.single'] = bench_each(lambda m: clf.predict_proba(vec.transform_csr([m])), queries)
+    return vec, clf, results
+
+
+def run_persistence(vec, clf, tmp, args):
+    results = {}
+    variants = [('', vec)]
+    if isinstance(vec, SimpleCountVectorizer):
+        compact = copy.copy(vec).compact_vocabulary()
+        variants.append(('.compact_vocab', compact))
+    for suffix, v in variants:
+        for fmt in ('pickle', 'binary'):
+            name = f'{fmt}{suffix}'
+            path = os.path.join(tmp, f'bench_model.{name}')
+            results[f'save_pipeline.{name}'] = bench(lambda: save_pipeline(path, v, clf, format=fmt), args.repeat)
+            results[f'load_pipeline.{name}'] = bench(lambda: load_pipeline(path), args.repeat)
+            results[f'load_pipeline.{name}']['file_bytes'] = os.path.getsize(path)
+    return results
+
+
+def run_web(vec, clf, queries, tmp):
+    """End-to-end POST /predict latency against an in-process webapp.py server."""
+    import webapp
+    path = os.path.join(tmp, 'web_model.pkl')
+    save_pipeline(path, vec, clf)
+    webapp.MODEL = ModelHolder(path)
+    # measure scoring, not cache hits: the synthetic queries may repeat
+    webapp.CACHE.max_size = 0
+
+    class QuietHandler(webapp.Handler):
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    port = server.server_address[1]
+
+    def post(message):
+        # webapp.py speaks HTTP/1.0, so every request opens a new connection
+        conn = http.client.HTTPConnection('127.0.0.1', port)
+        conn.request('POST', '/predict', urlencode({'message': message}),
+                     {'Content-Type': 'application/x-www-form-urlencoded'})
+        resp = conn.getresponse()
+        resp.read()
+        conn.close()
+        if resp.status != 200:
+            raise RuntimeError(f'/predict returned {resp.status}')
+
+    try:
+        post(queries[0])  # first request loads the model
+        return {'web./predict': bench_each(post, queries)}
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                             capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def compare(current, baseline_path):
+    """Print throughput of current vs a previous benchmark JSON, slowest first."""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    rows = []
+    for name, cur in current.items():
+        old = baseline.get(name)
+        if old and old.get('throughput_per_s') and cur.get('throughput_per_s'):
+            rows.append((cur['throughput_per_s'] / old['throughput_per_s'], name))
+    for ratio, name in sorted(rows):
+        flag = '  <-- slower' if ratio < 0.9 else ''
+        print(f'{name:28s} {ratio:6.2f}x{flag}', file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark vectorizer, classifier, persistence and web paths')
+    parser.add_argument('--n', type=int, default=20000, help='synthetic training messages')
+    parser.add_argument('--vocab-size', type=int, default=5000)
+    parser.add_argument('--queries', type=int, default=1000, help='messages scored by the predict benchmarks')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs of each whole-corpus benchmark')
+    parser.add_argument('--hash-bits', type=int, default=0, help='benchmark HashingVectorizer instead')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--skip-web', action='store_true')
+    parser.add_argument('--output', default='-', help="where to write the JSON report ('-' for stdout)")
+    parser.add_argument('--compare', help='previous report to print throughput ratios against')
+    args = parser.parse_args()
+
+    texts, labels = make_corpus(args.n, args.vocab_size, seed=args.seed)
+    queries, _ = make_corpus(args.queries, args.vocab_size, seed=args.seed + 1)
+    tmp = tempfile.mkdtemp(prefix='sms_bench_')
+    try:
+        vec, clf, results = run_core(texts, labels, queries, args)
+        results.update(run_persistence(vec, clf, tmp, args))
+        if not args.skip_web:
+            results.update(run_web(vec, clf, queries, tmp))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    report = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__ if np is not None else None,
+        'config': vars(args),
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output == '-':
+        print(text)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+import os
+import time
+import argparse
+from train import load_csv
+from sms_spam_detector.model import HashingVectorizer, save_pipeline, load_pipeline
+from sms_spam_detector.compaction import compact
+
+
+def df_limit(value):
+    # '0.9' is a fraction of the documents, '500' a document count
+    return float(value) if '.' in value else int(value)
+
+
+def describe(path, texts, labels):
+    t0 = time.perf_counter()
+    vec, clf = load_pipeline(path)
+    load_ms = (time.perf_counter() - t0) * 1000.0
+    row = {'features': len(vec.vocabulary_), 'bytes': os.path.getsize(path), 'load_ms': load_ms, 'accuracy': None}
+    if texts:
+        preds = clf.predict(vec.transform_csr(texts))
+        row['accuracy'] = sum(1 for p, y in zip(preds, labels) if p == y) / len(labels)
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prune a trained model\'s vocabulary and report the size/accuracy tradeoff')
+    parser.add_argument('--model', default='model.pkl')
+    parser.add_argument('--output', required=True, help='where to write the compacted model')
+    parser.add_argument('--format', choices=['pickle', 'binary'], default='pickle')
+    parser.add_argument('--data', help='labelled CSV used for max_df and to measure accuracy (usually the training data)')
+    parser.add_argument('--n', type=int, default=0, help='rows of --data to use (0 for all)')
+    parser.add_argument('--max-df', type=df_limit, default=None,
+                        help='drop features in more than this many documents (or this fraction, e.g. 0.5)')
+    parser.add_argument('--max-features', type=int, default=None, help='keep only the most frequent features')
+    parser.add_argument('--min-margin', type=float, default=None,
+                        help='drop features whose per-class log-probs differ by less than this')
+    parser.add_argument('--compact-vocab', action='store_true',
+                        help='also store the vocabulary as flat buffers instead of a dict')
+    args = parser.parse_args()
+    if args.max_df is not None and not args.data:
+        parser.error('--max-df needs --data to count document frequencies in')
+
+    vec, clf = load_pipeline(args.model)
+    if isinstance(vec, HashingVectorizer):
+        parser.error(f'{args.model} uses a hashing vectorizer: there is no vocabulary to prune '
+                     '(retrain with a smaller --hash-bits instead)')
+    texts, labels = load_csv(args.data, n_samples=args.n) if args.data else ([], [])
+    if args.max_df is not None and not texts:
+        parser.error(f'--max-df needs documents, but {args.data} has no rows')
+    vec, clf = compact(vec, clf, documents=texts or None, max_df=args.max_df,
+                       max_features=args.max_features, min_margin=args.min_margin)
+    if args.compact_vocab:
+        vec.compact_vocabulary()
+    save_pipeline(args.output, vec, clf, format=args.format)
+
+    before = describe(args.model, texts, labels)
+    after = describe(args.output, texts, labels)
+    print(f"{'':10s} {'features':>10s} {'bytes':>12s} {'load ms':>9s} {'accuracy':>9s}")
+    for name, row in (('before', before), ('after', after)):
+        acc = '-' if row['accuracy'] is None else f"{row['accuracy']:.3f}"
+        print(f"{name:10s} {row['features']:10d} {row['bytes']:12d} {row['load_ms']:9.2f} {acc:>9s}")
+    print(f"Compacted model saved to {args.output}")
+
+if __name__ == '__main__':
+    main()
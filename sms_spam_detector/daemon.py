@@ -0,0 +1,109 @@
+import os
+import sys
+import signal
+import socket
+import argparse
+import socketserver
+from sms_spam_detector.serving import ModelHolder, score_messages
+from sms_spam_detector.cache import PredictionCache
+from sms_spam_detector.protocol import DEFAULT_SOCKET, recv_frame, send_frame
+
+
+class Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        # one connection may carry many requests; stop at EOF or a bad frame
+        while True:
+            try:
+                request = recv_frame(self.request)
+            except (OSError, ValueError):
+                return
+            if request is None:
+                return
+            try:
+                reply = self.server.answer(request)
+            except Exception as e:
+                reply = {'error': f'{type(e).__name__}: {e}'}
+            try:
+                send_frame(self.request, reply)
+            except OSError:
+                return
+
+
+class PredictionDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Holds one loaded pipeline and answers prediction requests on a Unix socket.
+
+    The model is reloaded when its file changes (see ModelHolder) and
+    repeated messages are answered from a PredictionCache.
+    """
+    daemon_threads = True
+
+    def __init__(self, socket_path, model, cache):
+        self.model = model
+        self.cache = cache
+        super().__init__(socket_path, Handler)
+
+    def server_bind(self):
+        super().server_bind()
+        # only our own user may query the daemon
+        os.chmod(self.server_address, 0o600)
+
+    def answer(self, request):
+        if not isinstance(request, dict):
+            return {'error': 'expected a JSON object'}
+        path = request.get('model')
+        if path and os.path.realpath(path) != os.path.realpath(self.model.path):
+            # the client asked for another model; it loads that one itself
+            return {'error': f'this daemon serves {self.model.path}'}
+        messages = request.get('messages')
+        if not isinstance(messages, list) or not all(isinstance(m, str) for m in messages):
+            return {'error': 'messages must be a list of strings'}
+        vec, clf, generation = self.model.current()
+        if vec is None:
+            return {'error': f'no model at {self.model.path}'}
+        scored = self.cache.score(vec, messages, lambda batch: score_messages(vec, clf, batch), generation)
+        return {'results': [{'predicted': label, 'probs': probs} for label, probs in scored]}
+
+
+def claim_socket(path):
+    """Remove a socket file left behind by a daemon that is no longer running."""
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.remove(path)
+        return
+    finally:
+        probe.close()
+    raise SystemExit(f'a daemon is already listening on {path}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Keep a model loaded and serve predictions on a Unix socket')
+    parser.add_argument('--model', default='model.pkl')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET, help='Unix socket path to listen on')
+    parser.add_argument('--cache-size', type=int, default=10000,
+                        help='prediction cache entries (0 disables the cache)')
+    args = parser.parse_args()
+
+    model = ModelHolder(os.path.abspath(args.model))
+    if model.get()[0] is None:
+        parser.error(f'cannot load a model from {args.model}')
+    claim_socket(args.socket)
+    server = PredictionDaemon(args.socket, model, PredictionCache(max_size=args.cache_size))
+    # SIGTERM should clean up the socket file like Ctrl-C does
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f'Serving {args.model} on {args.socket}', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+import time
+import argparse
+from train import load_csv
+from sms_spam_detector.model import SimpleCountVectorizer, HashingVectorizer, MultinomialNB
+from sms_spam_detector.evaluation import CrossValidation, binary_scores
+
+
+def make_vectorizer(args, min_df=1):
+    features = {'ngram_range': tuple(args.ngram_range), 'analyzer': args.analyzer}
+    if args.hash_bits:
+        return HashingVectorizer(n_bits=args.hash_bits, **features)
+    return SimpleCountVectorizer(min_df=min_df, **features)
+
+
+def refit_folds(texts, labels, folds, args):
+    """The slow reference: fit_transform and fit from scratch for every fold."""
+    preds = [None] * len(texts)
+    for fold in range(args.k):
+        train = [i for i, f in enumerate(folds) if f != fold]
+        test = [i for i, f in enumerate(folds) if f == fold]
+        vec = make_vectorizer(args, args.min_df)
+        clf = MultinomialNB(alpha=args.alpha)
+        clf.fit(vec.fit_transform([texts[i] for i in train]), [labels[i] for i in train])
+        for i, p in zip(test, clf.predict(vec.transform([texts[i] for i in test]))):
+            preds[i] = p
+    return preds
+
+
+def fmt(value):
+    return '-' if value is None else f'{value:.3f}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='k-fold cross-validation from one counting pass')
+    parser.add_argument('--data', default='data/sms_sample_20.csv')
+    parser.add_argument('--n', type=int, default=20, help='number of samples to use from the dataset (0 for all)')
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--alpha', type=float, default=1.0)
+    parser.add_argument('--min-df', type=int, default=1)
+    parser.add_argument('--hash-bits', type=int, default=None)
+    parser.add_argument('--ngram-range', type=int, nargs=2, default=(1, 1), metavar=('MIN_N', 'MAX_N'))
+    parser.add_argument('--analyzer', choices=['word', 'char_wb'], default='word')
+    parser.add_argument('--positive', default='spam', help='class that precision and recall are reported for')
+    parser.add_argument('--seed', type=int, default=0, help='seed for the fold shuffle')
+    parser.add_argument('--refit', action='store_true',
+                        help='also refit every fold from scratch, to compare results and time')
+    args = parser.parse_args()
+
+    texts, labels = load_csv(args.data, n_samples=args.n)
+    cv = CrossValidation(texts, labels, k=args.k, vectorizer=make_vectorizer(args), seed=args.seed)
+    report = cv.evaluate(alpha=args.alpha, min_df=args.min_df, positive=args.positive)
+
+    print(f"{args.k}-fold cross-validation on {len(texts)} samples (alpha={args.alpha}, min_df={args.min_df})")
+    print(f"{'fold':>6s} {'accuracy':>9s} {'precision':>10s} {'recall':>7s} {'features':>9s}")
+    for i, fold in enumerate(report['folds']):
+        print(f"{i:6d} {fmt(fold['accuracy']):>9s} {fmt(fold['precision']):>10s} "
+              f"{fmt(fold['recall']):>7s} {fold['n_features']:9d}")
+    print(f"{'all':>6s} {fmt(report['accuracy']):>9s} {fmt(report['precision']):>10s} {fmt(report['recall']):>7s}")
+    total = report['vectorize_seconds'] + report['count_seconds'] + report['evaluate_seconds']
+    print(f"Time: vectorize {report['vectorize_seconds']:.3f}s, count {report['count_seconds']:.3f}s, "
+          f"folds {report['evaluate_seconds']:.3f}s, total {total:.3f}s")
+
+    if args.refit:
+        t0 = time.perf_counter()
+        preds = refit_folds(texts, labels, cv.folds, args)
+        elapsed = time.perf_counter() - t0
+        ref = binary_scores(preds, labels, args.positive)
+        print(f"Refit from scratch: accuracy {fmt(ref['accuracy'])}, precision {fmt(ref['precision'])}, "
+              f"recall {fmt(ref['recall'])} in {elapsed:.3f}s ({elapsed / total:.1f}x slower)")
+
+if __name__ == '__main__':
+    main()
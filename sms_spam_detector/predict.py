@@ -1,45 +1,219 @@
-import argparse
-from sms_spam_detector.model import load_pipeline
-
-
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument('--model', default='model.pkl')
-    parser.add_argument('--message', required=True)
-    args = parser.parse_args()
-
-    vec, clf = load_pipeline(args.model)
-    x = vec.transform([args.message])
-    pred = clf.predict(x)[0]
-    probs = clf.predict_proba(x)[0]
-    print(f"Message: {args.message}")
-    print(f"Predicted: {pred}")
-    print("Class probabilities:")
-    for c, p in probs.items():
-        print(f"  {c}: {p:.4f}")
-
-
-if __name__ == '__main__':
-    main()
-import argparse
-from sms_spam_detector.model import load_pipeline
-
-
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument('--model', default='model.pkl')
-    parser.add_argument('--message', required=True)
-    args = parser.parse_args()
-
-    vec, clf = load_pipeline(args.model)
-    x = vec.transform([args.message])
-    pred = clf.predict(x)[0]
-    probs = clf.predict_proba(x)[0]
-    print(f"Message: {args.message}")
-    print(f"Predicted: {pred}")
-    print("Class probabilities:")
-    for c, p in probs.items():
-        print(f"  {c}: {p:.4f}")
-
-if __name__ == '__main__':
-    main()
+import os
+import sys
+import csv
+import json
+import argparse
+from itertools import islice
+
+# the model, cache and process pool are imported where they are used, so
+# `--daemon --message` can answer without ever importing them
+
+# set once per process: by main() or, in spawned workers, by _init_worker
+_pipeline = None
+_pipeline_path = None
+_cache = None
+
+
+def _format(path, fmt):
+    if fmt:
+        return fmt
+    return 'jsonl' if path.endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def read_messages(f, fmt):
+    """Yield (id, message) pairs from a CSV or JSONL stream.
+
+    CSV rows take the message from a 'text' (or 'message') column and the
+    id from an optional 'id' column; JSONL lines may be strings or objects
+    with 'message'/'text' and 'id'. Rows without an id are numbered from 1.
+    Malformed input raises ValueError naming the row (or JSONL line).
+    """
+    if fmt == 'jsonl':
+        rows = _jsonl_rows(f)
+    else:
+        rows = ((f'row {n}', _csv_row(row)) for n, row in enumerate(csv.DictReader(f), 1))
+    for n, (where, row) in enumerate(rows, 1):
+        if isinstance(row, str):
+            yield n, row
+            continue
+        text = row.get('text')
+        if text is None:
+            text = row.get('message')
+        if text is None:
+            raise ValueError(f"{where} has no 'text' or 'message' field")
+        if not isinstance(text, str):
+            raise ValueError(f'{where}: the message must be a string, not {type(text).__name__}')
+        # ids such as 0 or "" are kept; only a missing id is replaced
+        yield row['id'] if row.get('id') is not None else n, text
+
+
+def _csv_row(row):
+    # an empty id cell is how CSV spells "no id"
+    if row.get('id') == '':
+        row['id'] = None
+    return row
+
+
+def _jsonl_rows(f):
+    for lineno, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        where = f'line {lineno}'
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f'{where} is not valid JSON: {e}') from None
+        if not isinstance(row, (str, dict)):
+            raise ValueError(f'{where} must be a JSON string or object, not {type(row).__name__}')
+        yield where, row
+
+
+def batches(items, size):
+    it = iter(items)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _load(model_path, cache_size):
+    global _pipeline, _cache, _pipeline_path
+    from sms_spam_detector.model import load_pipeline
+    from sms_spam_detector.cache import PredictionCache
+    _pipeline_path = model_path
+    _pipeline = load_pipeline(model_path)
+    _cache = PredictionCache(max_size=cache_size)
+
+
+def _init_worker(model_path, cache_size):
+    # forked workers inherit the parent's pipeline; spawned ones load it
+    if _pipeline is None:
+        _load(model_path, cache_size)
+
+
+def _score_messages(messages):
+    vec, clf = _pipeline
+    labels, _, probs_rows = clf.predict_batch(vec.transform_csr(messages))
+    return list(zip(labels, probs_rows))
+
+
+def score_batch(batch):
+    """Score [(id, message), ...]; returns [(id, label, {class: prob}), ...]."""
+    vec, _ = _pipeline
+    scored = _cache.score(vec, [m for _, m in batch], _score_messages)
+    return [(id_, label, probs) for (id_, _), (label, probs) in zip(batch, scored)]
+
+
+def score_stream(batch_iter, jobs=1):
+    """Yield scored batches in input order, holding at most 2*jobs batches in flight."""
+    if jobs <= 1:
+        for batch in batch_iter:
+            yield score_batch(batch)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(_pipeline_path, _cache.max_size)) as pool:
+        pending = []
+        for batch in batch_iter:
+            pending.append(pool.submit(score_batch, batch))
+            if len(pending) >= 2 * jobs:
+                yield pending.pop(0).result()
+        for fut in pending:
+            yield fut.result()
+
+
+def write_results(out, fmt, classes, scored_batches):
+    count = 0
+    if fmt == 'jsonl':
+        for batch in scored_batches:
+            for id_, label, probs in batch:
+                out.write(json.dumps({'id': id_, 'predicted': label, 'probs': probs}) + '\n')
+            out.flush()
+            count += len(batch)
+        return count
+    writer = csv.writer(out)
+    writer.writerow(['id', 'predicted'] + [f'p_{c}' for c in classes])
+    for batch in scored_batches:
+        for id_, label, probs in batch:
+            writer.writerow([id_, label] + [f'{probs[c]:.6f}' for c in classes])
+        out.flush()
+        count += len(batch)
+    return count
+
+
+def predict_via_daemon(socket_path, model_path, message, timeout):
+    """(label, probs) from a running daemon.py, or None if none can answer."""
+    from sms_spam_detector.protocol import request
+    try:
+        reply = request(socket_path, {'model': os.path.abspath(model_path), 'messages': [message]}, timeout)
+    except (OSError, ValueError, AttributeError):
+        # no daemon, one run by another user, or no AF_UNIX on this
+        # platform: load the model ourselves
+        return None
+    if 'error' in reply:
+        return None
+    result = reply['results'][0]
+    return result['predicted'], result['probs']
+
+
+def print_prediction(message, pred, probs):
+    print(f"Message: {message}")
+    print(f"Predicted: {pred}")
+    print("Class probabilities:")
+    for c, p in probs.items():
+        print(f"  {c}: {p:.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', default='model.pkl')
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--message')
+    group.add_argument('--input', help="CSV or JSONL file of messages to score ('-' for stdin)")
+    parser.add_argument('--output', default='-', help="where to write results ('-' for stdout)")
+    parser.add_argument('--input-format', choices=['csv', 'jsonl'], help='default: from the file extension, else csv')
+    parser.add_argument('--output-format', choices=['csv', 'jsonl'], help='default: from the file extension, else csv')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--jobs', type=int, default=1, help='worker processes used to score batches')
+    parser.add_argument('--cache-size', type=int, default=10000,
+                        help='repeated messages answered from an LRU cache (0 disables it)')
+    parser.add_argument('--daemon', action='store_true',
+                        help='ask a running daemon.py for --message, loading the model here only if none answers')
+    parser.add_argument('--socket', help='daemon socket path (default: the one daemon.py uses)')
+    parser.add_argument('--daemon-timeout', type=float, default=5.0, help='seconds to wait for the daemon')
+    args = parser.parse_args()
+
+    if args.daemon and args.message is not None:
+        from sms_spam_detector.protocol import DEFAULT_SOCKET
+        answer = predict_via_daemon(args.socket or DEFAULT_SOCKET, args.model, args.message, args.daemon_timeout)
+        if answer is not None:
+            print_prediction(args.message, *answer)
+            return
+
+    _load(args.model, args.cache_size)
+    vec, clf = _pipeline
+
+    if args.message is not None:
+        labels, _, probs_rows = clf.predict_batch(vec.transform_csr([args.message]))
+        print_prediction(args.message, labels[0], probs_rows[0])
+        return
+
+    in_fmt = _format(args.input, args.input_format)
+    out_fmt = _format(args.output, args.output_format)
+    fin = sys.stdin if args.input == '-' else open(args.input, newline='', encoding='utf-8')
+    fout = sys.stdout if args.output == '-' else open(args.output, 'w', newline='', encoding='utf-8')
+    try:
+        scored = score_stream(batches(read_messages(fin, in_fmt), args.batch_size), jobs=args.jobs)
+        count = write_results(fout, out_fmt, clf.classes_, scored)
+    except ValueError as e:
+        parser.error(f'{args.input}: {e}')
+    finally:
+        if fin is not sys.stdin:
+            fin.close()
+        if fout is not sys.stdout:
+            fout.close()
+    print(f"Scored {count} messages", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,2 @@
-# Package initializer for sms_spam_detector
-__all__ = ["model"]
-# Package initializer for sms_spam_detector
-__all__ = ["model"]
+# Package initializer for sms_spam_detector
+__all__ = ["model", "modelfile", "serving", "cache", "parallel", "metrics", "compaction", "protocol", "evaluation", "registry", "vocabulary"]
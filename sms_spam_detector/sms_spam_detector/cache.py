@@ -0,0 +1,97 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """Bounded LRU cache of prediction results, with an optional TTL.
+
+    - keys are the vectorizer's normalized form of a message, so bulk
+      campaign copies that differ only in case or punctuation (or
+      spacing, for char n-grams) share one entry
+    - every lookup carries the generation of the model that would score
+      it; a different generation than last time empties the cache, so a
+      retrained or cleared model never serves stale predictions
+    - max_size=0 disables caching
+    """
+    def __init__(self, max_size=10000, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._generation = None
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _check_generation(self, generation):
+        if generation != self._generation:
+            if self._data:
+                self.invalidations += 1
+            self._data.clear()
+            self._generation = generation
+
+    def set_generation(self, generation):
+        """Drop the entries if they belong to another model generation."""
+        with self._lock:
+            self._check_generation(generation)
+
+    def get(self, key, generation=None):
+        with self._lock:
+            self._check_generation(generation)
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value, generation=None):
+        if self.max_size <= 0:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._check_generation(generation)
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def score(self, vectorizer, messages, score_fn, generation=None):
+        """Return score_fn-style results for messages, scoring only the misses.
+
+        score_fn(messages) must return one result per message, in order; the
+        misses are passed to it as a single batch.
+        """
+        if self.max_size <= 0:
+            return score_fn(messages)
+        keys = [vectorizer._normalize(m) for m in messages]
+        results = [self.get(k, generation) for k in keys]
+        missing = [i for i, r in enumerate(results) if r is None]
+        if missing:
+            scored = score_fn([messages[i] for i in missing])
+            for i, r in zip(missing, scored):
+                results[i] = r
+                self.put(keys[i], r, generation)
+        return results
+
+    def stats(self):
+        return {
+            'size': len(self._data),
+            'max_size': self.max_size,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
@@ -0,0 +1,95 @@
+"""Vocabulary pruning for fitted count-vectorizer pipelines.
+
+compact() drops features from a fitted (SimpleCountVectorizer,
+MultinomialNB) pair, re-indexes the survivors densely and recomputes the
+log-probs from the remaining counts, as if the model had been trained on
+the smaller vocabulary. Fewer features mean smaller files, faster loads
+and smaller scoring tables.
+"""
+import heapq
+import math
+from collections import defaultdict, Counter
+
+from .model import HashingVectorizer, MultinomialNB, SimpleCountVectorizer
+from .vocabulary import CompactVocabulary
+
+
+def feature_margins(model, indices):
+    """{index: largest minus smallest per-class log-prob} for the given indices.
+
+    For a two-class model this is the absolute log-odds a single
+    occurrence of the feature adds; features near 0 barely move a
+    prediction either way.
+    """
+    logp = model.feature_log_prob_
+    classes = model.classes_
+    # pipelines saved with dense log-probs have no defaults recorded; fall
+    # back the way CompiledNB.from_model does
+    n = model.n_features_
+    fallback = math.log(model.alpha / (model.alpha * n)) if n else 0.0
+    default = {c: model.default_log_prob_.get(c, fallback) for c in classes}
+    margins = {}
+    for idx in indices:
+        vals = [logp[c].get(idx, default[c]) for c in classes]
+        margins[idx] = max(vals) - min(vals)
+    return margins
+
+
+def document_frequencies(vectorizer, documents):
+    """Counter of feature index -> number of documents containing it."""
+    df = Counter()
+    for row in vectorizer.transform(documents):
+        df.update(row.keys())
+    return df
+
+
+def compact(vectorizer, model, documents=None, max_df=None, max_features=None, min_margin=None):
+    """Return a pruned copy of (vectorizer, model); the inputs are left untouched.
+
+    - max_df: drop features found in more than this many documents (a
+      float is a fraction of len(documents)); needs documents, usually the
+      training corpus, since document frequencies are not stored
+    - min_margin: drop features whose feature_margins() value is below it
+    - max_features: then keep only this many, the most frequent in training
+    """
+    if isinstance(vectorizer, HashingVectorizer):
+        raise ValueError('hashing vectorizers have no vocabulary to prune')
+    vocab = vectorizer.vocabulary_
+    feature_count = model.feature_count_
+    keep = set(vocab.values())
+    if max_df is not None:
+        if documents is None:
+            raise ValueError('max_df needs the documents to count document frequencies in')
+        documents = list(documents)
+        limit = max_df * len(documents) if isinstance(max_df, float) else max_df
+        df = document_frequencies(vectorizer, documents)
+        keep = {i for i in keep if df[i] <= limit}
+    if min_margin is not None:
+        margins = feature_margins(model, keep)
+        keep = {i for i in keep if margins[i] >= min_margin}
+    if max_features is not None and len(keep) > max_features:
+        totals = {i: sum(feature_count[c].get(i, 0) for c in model.classes_) for i in keep}
+        # sorted first so ties keep the lower (older) index
+        keep = set(heapq.nlargest(max_features, sorted(keep), key=totals.__getitem__))
+
+    # dense re-index, preserving the relative order of the old indices
+    remap = {old: new for new, old in enumerate(sorted(keep))}
+    vec = SimpleCountVectorizer(min_df=vectorizer.min_df, ngram_range=vectorizer.ngram_range,
+                                analyzer=vectorizer.analyzer, max_features=vectorizer.max_features,
+                                keep_pending=vectorizer.keep_pending)
+    vec.vocabulary_ = {t: remap[i] for t, i in vocab.items() if i in remap}
+    vec.pending_df_ = Counter(vectorizer.pending_df_)
+    if isinstance(vocab, CompactVocabulary):
+        vec.compact_vocabulary()
+
+    clf = MultinomialNB(alpha=model.alpha)
+    clf.class_count_ = Counter(model.class_count_)
+    clf.feature_count_ = defaultdict(Counter, {
+        c: Counter({remap[i]: n for i, n in counts.items() if i in remap})
+        for c, counts in feature_count.items()
+    })
+    clf.classes_ = list(model.classes_)
+    clf.n_features_ = len(remap)
+    # log-probs are rebuilt from the pruned counts on first use
+    clf._stale = True
+    return vec, clf
@@ -0,0 +1,215 @@
+"""k-fold cross-validation from a single counting pass.
+
+Naive Bayes statistics are sums over documents, so the model trained on
+every fold but one is the corpus totals minus that fold's counts.
+CrossValidation vectorizes and counts once; each fold's model is then a
+subtraction plus the usual log-prob finalization, instead of a fresh
+fit_transform and fit per fold.
+
+The count vectorizer's vocabulary is emulated per fold too: document
+frequencies are kept per fold, a feature belongs to a fold's vocabulary
+when its document frequency outside the fold reaches min_df, and held-out
+rows lose features outside it, exactly as a vectorizer fitted on the
+training folds would drop them. Results match refitting from scratch.
+"""
+import time
+import random
+from collections import defaultdict, Counter
+
+from .model import HashingVectorizer, MultinomialNB, SimpleCountVectorizer
+from .parallel import map_shards, resolve_n_jobs
+
+
+def fold_assignments(n, k, seed=0):
+    """Fold id (0..k-1) of each of n rows: a seeded shuffle dealt round-robin."""
+    order = list(range(n))
+    random.Random(seed).shuffle(order)
+    folds = [0] * n
+    for pos, i in enumerate(order):
+        folds[i] = pos % k
+    return folds
+
+
+def binary_scores(preds, labels, positive):
+    """Accuracy plus precision/recall/F1 of the positive class (None when undefined)."""
+    tp = fp = fn = correct = 0
+    for p, y in zip(preds, labels):
+        if p == y:
+            correct += 1
+        if p == positive and y == positive:
+            tp += 1
+        elif p == positive:
+            fp += 1
+        elif y == positive:
+            fn += 1
+    return {
+        'accuracy': correct / len(labels) if labels else None,
+        'precision': tp / (tp + fp) if tp + fp else None,
+        'recall': tp / (tp + fn) if tp + fn else None,
+        'f1': 2 * tp / (2 * tp + fp + fn) if tp else None,
+    }
+
+
+class CrossValidation:
+    """Per-fold count tables for k-fold evaluation of the NB pipeline.
+
+    vectorizer is an unfitted template: its analyzer/ngram_range (or, for
+    a HashingVectorizer, its n_bits) are used, while min_df is chosen per
+    evaluate() call. max_features is not emulated.
+    """
+    def __init__(self, texts, labels, k=5, vectorizer=None, seed=0):
+        if k < 2:
+            raise ValueError('k-fold cross-validation needs k >= 2')
+        if len(texts) < k:
+            raise ValueError(f'need at least k={k} documents, got {len(texts)}')
+        template = vectorizer or SimpleCountVectorizer()
+        self.hashing = isinstance(template, HashingVectorizer)
+        if self.hashing:
+            self.vectorizer = template
+        else:
+            # every feature of the corpus; min_df is applied per fold later
+            self.vectorizer = SimpleCountVectorizer(ngram_range=template.ngram_range, analyzer=template.analyzer)
+        self.k = k
+        self.labels = list(labels)
+        self.folds = fold_assignments(len(texts), k, seed)
+
+        t0 = time.perf_counter()
+        if not self.hashing:
+            self.vectorizer.fit(texts)
+        self.rows = self.vectorizer.transform(texts)
+        self.vectorize_seconds = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        self.class_count = [Counter() for _ in range(k)]
+        self.feature_count = [defaultdict(Counter) for _ in range(k)]
+        self.doc_freq = [Counter() for _ in range(k)]
+        for row, label, fold in zip(self.rows, self.labels, self.folds):
+            self.class_count[fold][label] += 1
+            self.feature_count[fold][label].update(row)
+            self.doc_freq[fold].update(row.keys())
+        self.total_class_count = sum(self.class_count, Counter())
+        self.total_feature_count = defaultdict(Counter)
+        for counts in self.feature_count:
+            for label, c in counts.items():
+                self.total_feature_count[label].update(c)
+        self.total_doc_freq = sum(self.doc_freq, Counter())
+        self.count_seconds = time.perf_counter() - t0
+        # (fold, min_df) -> counts and held-out rows in that fold's index space
+        self._tables = {}
+
+    def __getstate__(self):
+        # sent to sweep workers: they rebuild their own tables
+        state = self.__dict__.copy()
+        state['_tables'] = {}
+        return state
+
+    def fold_vocabulary(self, fold, min_df=1):
+        """{global index: fold index} of the features a vectorizer fitted without fold would keep."""
+        fold_df = self.doc_freq[fold]
+        kept = sorted(i for i, d in self.total_doc_freq.items() if d - fold_df[i] >= min_df)
+        return {old: new for new, old in enumerate(kept)}
+
+    def _fold_tables(self, fold, min_df):
+        key = (fold, min_df)
+        tables = self._tables.get(key)
+        if tables is not None:
+            return tables
+        if any(m != min_df for _, m in self._tables):
+            # callers go through one min_df at a time; keep only its tables
+            self._tables.clear()
+        class_count = self.total_class_count - self.class_count[fold]
+        held_out = self.feature_count[fold]
+        feature_count = {c: self.total_feature_count[c] - held_out.get(c, Counter()) for c in class_count}
+        members = [i for i, f in enumerate(self.folds) if f == fold]
+        rows = [self.rows[i] for i in members]
+        if self.hashing:
+            # as in MultinomialNB.fit: one past the largest bucket seen
+            n_features = max((i + 1 for counts in feature_count.values() for i in counts), default=0)
+        else:
+            remap = self.fold_vocabulary(fold, min_df)
+            feature_count = {c: Counter({remap[i]: n for i, n in counts.items() if i in remap})
+                             for c, counts in feature_count.items()}
+            rows = [{remap[j]: n for j, n in row.items() if j in remap} for row in rows]
+            n_features = len(remap)
+        tables = (class_count, feature_count, n_features, members, rows)
+        self._tables[key] = tables
+        return tables
+
+    def fold_model(self, fold, alpha=1.0, min_df=1):
+        """The model trained on every fold but `fold`, in that fold's index space."""
+        class_count, feature_count, n_features, _, _ = self._fold_tables(fold, min_df)
+        clf = MultinomialNB(alpha=alpha)
+        clf.class_count_ = class_count
+        clf.feature_count_ = defaultdict(Counter, feature_count)
+        clf.classes_ = sorted(class_count)
+        clf.n_features_ = n_features
+        # log-probs are derived from the subtracted counts on first use;
+        # alpha only enters there, so the tables are shared across alphas
+        clf._stale = True
+        return clf
+
+    def model_size(self, min_df=1):
+        """(features, approximate binary file bytes) of a model fitted on all rows."""
+        n_classes = len(self.total_class_count)
+        if self.hashing:
+            n_features = max((i + 1 for i in self.total_doc_freq), default=0)
+            return n_features, 8 * n_classes * n_features
+        kept = [t for t, i in self.vectorizer.vocabulary_.items() if self.total_doc_freq[i] >= min_df]
+        vocab_bytes = sum(len(t.encode('utf-8')) + 1 for t in kept)
+        return len(kept), 8 * n_classes * len(kept) + vocab_bytes
+
+    def evaluate(self, alpha=1.0, min_df=1, positive='spam'):
+        """Score every fold; returns pooled and per-fold accuracy/precision/recall."""
+        t0 = time.perf_counter()
+        preds = [None] * len(self.rows)
+        per_fold = []
+        for fold in range(self.k):
+            clf = self.fold_model(fold, alpha, min_df)
+            _, _, _, members, rows = self._fold_tables(fold, min_df)
+            fold_preds = clf.predict(rows)
+            for i, p in zip(members, fold_preds):
+                preds[i] = p
+            scores = binary_scores(fold_preds, [self.labels[i] for i in members], positive)
+            scores['n_features'] = clf.n_features_
+            per_fold.append(scores)
+        report = binary_scores(preds, self.labels, positive)
+        report.update({
+            'k': self.k,
+            'alpha': alpha,
+            'min_df': min_df,
+            'positive': positive,
+            'folds': per_fold,
+            'vectorize_seconds': self.vectorize_seconds,
+            'count_seconds': self.count_seconds,
+            'evaluate_seconds': time.perf_counter() - t0,
+        })
+        return report
+
+
+def cross_validate(texts, labels, k=5, vectorizer=None, alpha=1.0, min_df=1, positive='spam', seed=0):
+    """One-shot CrossValidation(...).evaluate(...)."""
+    return CrossValidation(texts, labels, k=k, vectorizer=vectorizer, seed=seed).evaluate(alpha, min_df, positive)
+
+
+def _sweep_shard(cv, shard):
+    grid, positive = shard
+    return [cv.evaluate(alpha, min_df, positive) for min_df, alpha in grid]
+
+
+def sweep(cv, alphas, min_dfs, positive='spam', n_jobs=None):
+    """Evaluate every (alpha, min_df) pair on the cached counts of cv.
+
+    The grid is dealt out to n_jobs processes (-1 for all cores); each
+    report gains the full-data model size for its min_df. Reports come
+    back ordered by (min_df, alpha).
+    """
+    grid = sorted((min_df, alpha) for min_df in min_dfs for alpha in alphas)
+    n_shards = max(1, min(resolve_n_jobs(n_jobs), len(grid)))
+    # deal round-robin, so each worker gets a mix of cheap and costly settings
+    shards = [(grid[i::n_shards], positive) for i in range(n_shards)]
+    reports = [r for part in map_shards(_sweep_shard, shards, n_jobs, state=cv) for r in part]
+    reports.sort(key=lambda r: (r['min_df'], r['alpha']))
+    sizes = {min_df: cv.model_size(min_df) for min_df in set(min_dfs)}
+    for report in reports:
+        report['n_features'], report['size_bytes'] = sizes[report['min_df']]
+    return reports
@@ -0,0 +1,160 @@
+"""Opt-in latency histograms and counters in the Prometheus text format.
+
+Hot paths bracket their work with clock()/observe():
+
+    t0 = metrics.clock()
+    ...
+    metrics.observe('score', t0)
+
+While timing is disabled (the default) clock() returns None and observe()
+returns at once, so an instrumented call costs two trivial function calls.
+Call enable() to start recording, and REGISTRY.render() to export.
+Recording is per process: shards run in worker processes and pre-forked
+web workers each keep their own numbers.
+"""
+import time
+import bisect
+import threading
+
+# seconds; spans a cache hit on one message up to a full training run
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+enabled = False
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        # counts[i] is the number of observations in (buckets[i-1], buckets[i]]
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def cumulative(self):
+        """[(upper bound, observations <= bound), ...] ending with +Inf."""
+        with self._lock:
+            counts = list(self.counts)
+        out = []
+        total = 0
+        for bound, n in zip(self.buckets + (float('inf'),), counts):
+            total += n
+            out.append((bound, total))
+        return out
+
+
+def _labels(labels, extra=()):
+    pairs = tuple(labels) + tuple(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in pairs) + '}'
+
+
+def _bound(b):
+    return '+Inf' if b == float('inf') else repr(b)
+
+
+class Registry:
+    """Named histograms and counters, each keyed by a tuple of label pairs.
+
+    Collectors are callables that return extra (name, type, help, labels,
+    value) samples at render time, for counters that already live on other
+    objects (ModelHolder.loads, PredictionCache.hits, ...).
+    """
+    def __init__(self):
+        self._histograms = {}
+        self._counters = {}
+        self._help = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def histogram(self, name, labels=(), help=''):
+        key = (name, tuple(labels))
+        h = self._histograms.get(key)
+        if h is None:
+            with self._lock:
+                h = self._histograms.setdefault(key, Histogram())
+                self._help.setdefault(name, help)
+        return h
+
+    def inc(self, name, labels=(), value=1, help=''):
+        key = (name, tuple(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+            self._help.setdefault(name, help)
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render(self):
+        lines = []
+        seen = set()
+
+        def header(name, kind, help):
+            if name not in seen:
+                seen.add(name)
+                if help:
+                    lines.append(f'# HELP {name} {help}')
+                lines.append(f'# TYPE {name} {kind}')
+
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+        for (name, labels), h in histograms:
+            header(name, 'histogram', self._help.get(name))
+            for bound, n in h.cumulative():
+                lines.append(f'{name}_bucket{_labels(labels, [("le", _bound(bound))])} {n}')
+            lines.append(f'{name}_sum{_labels(labels)} {h.sum!r}')
+            lines.append(f'{name}_count{_labels(labels)} {h.count}')
+        for (name, labels), value in counters:
+            header(name, 'counter', self._help.get(name))
+            lines.append(f'{name}{_labels(labels)} {value}')
+        for collector in self._collectors:
+            for name, kind, help, labels, value in collector():
+                header(name, kind, help)
+                lines.append(f'{name}{_labels(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def enable(on=True):
+    global enabled
+    enabled = on
+
+
+def clock():
+    """Start time for observe(), or None while timing is disabled."""
+    return time.perf_counter() if enabled else None
+
+
+def observe(stage, t0):
+    """Record the seconds since t0 under sms_stage_seconds{stage=...}."""
+    if t0 is None:
+        return
+    REGISTRY.histogram('sms_stage_seconds', (('stage', stage),),
+                       help='Time spent per pipeline stage').observe(time.perf_counter() - t0)
+
+
+def observe_request(route, status, t0):
+    """Record one served HTTP request: latency histogram plus a status counter."""
+    if t0 is None:
+        return
+    REGISTRY.histogram('sms_request_seconds', (('route', route),),
+                       help='HTTP request latency').observe(time.perf_counter() - t0)
+    REGISTRY.inc('sms_requests_total', (('route', route), ('status', str(status))),
+                 help='HTTP requests served')
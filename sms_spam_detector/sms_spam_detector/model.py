@@ -1,298 +1,872 @@
-import re
-import math
-import pickle
-from collections import defaultdict, Counter
-
-
-class SimpleCountVectorizer:
-    """Very small tokenizer + count vectorizer.
-    - lowercases, removes non-alphanum, splits on whitespace
-    - supports fit, transform, fit_transform
-    """
-    def __init__(self, min_df=1):
-        self.min_df = min_df
-        self.vocabulary_ = {}
-
-    def _tokenize(self, text):
-        text = text.lower()
-        text = re.sub(r"[^a-z0-9\s]", " ", text)
-        tokens = [t for t in text.split() if t]
-        return tokens
-
-    def fit(self, documents):
-        df = Counter()
-        for doc in documents:
-            tokens = set(self._tokenize(doc))
-            for t in tokens:
-                df[t] += 1
-        idx = 0
-        for t, count in df.items():
-            if count >= self.min_df:
-                self.vocabulary_[t] = idx
-                idx += 1
-        return self
-
-    def transform(self, documents):
-        rows = []
-        for doc in documents:
-            cnt = defaultdict(int)
-            for t in self._tokenize(doc):
-                if t in self.vocabulary_:
-                    cnt[self.vocabulary_[t]] += 1
-            rows.append(dict(cnt))
-        return rows
-
-    def fit_transform(self, documents):
-        self.fit(documents)
-        return self.transform(documents)
-
-
-class MultinomialNB:
-    """Simple Multinomial Naive Bayes with add-one smoothing."""
-    def __init__(self, alpha=1.0):
-        self.alpha = alpha
-        self.class_count_ = Counter()
-        self.feature_count_ = defaultdict(Counter)
-        self.class_log_prior_ = {}
-        self.feature_log_prob_ = defaultdict(dict)
-        self.classes_ = []
-        self.n_features_ = 0
-
-    def fit(self, X_counts, y):
-        self.classes_ = sorted(set(y))
-        self.n_features_ = 0
-        for row in X_counts:
-            for idx in row.keys():
-                if idx + 1 > self.n_features_:
-                    self.n_features_ = idx + 1
-        for row, label in zip(X_counts, y):
-            self.class_count_[label] += 1
-            for idx, c in row.items():
-                self.feature_count_[label][idx] += c
-        total = sum(self.class_count_.values())
-        for c in self.classes_:
-            self.class_log_prior_[c] = math.log(self.class_count_[c] / total)
-        for c in self.classes_:
-            total_count = sum(self.feature_count_[c].values())
-            denom = total_count + self.alpha * self.n_features_
-            for idx in range(self.n_features_):
-                num = self.feature_count_[c].get(idx, 0.0) + self.alpha
-                self.feature_log_prob_[c][idx] = math.log(num / denom)
-        return self
-
-    def predict_log_proba_single(self, x_counts):
-        res = {}
-        for c in self.classes_:
-            logp = self.class_log_prior_.get(c, float('-inf'))
-            for idx, cnt in x_counts.items():
-                if idx < self.n_features_:
-                    logp += self.feature_log_prob_[c].get(idx, math.log(self.alpha / (self.alpha * self.n_features_))) * cnt
-                else:
-                    logp += math.log(self.alpha / (self.alpha * (self.n_features_ + 1))) * cnt
-            res[c] = logp
-        return res
-
-    def predict(self, X_counts):
-        preds = []
-        for row in X_counts:
-            logp = self.predict_log_proba_single(row)
-            preds.append(max(logp.items(), key=lambda x: x[1])[0])
-        return preds
-
-    def predict_proba(self, X_counts):
-        out = []
-        for row in X_counts:
-            logp = self.predict_log_proba_single(row)
-            vals = list(logp.values())
-            maxv = max(vals)
-            exps = [math.exp(v - maxv) for v in vals]
-            s = sum(exps)
-            probs = [e / s for e in exps]
-            out.append({c: p for c, p in zip(self.classes_, probs)})
-        return out
-
-
-# helpers to save/load pipeline
-def save_pipeline(path, vectorizer, model):
-    model_state = {
-        'alpha': model.alpha,
-        'class_count': dict(model.class_count_),
-        'feature_count': {k: dict(v) for k, v in model.feature_count_.items()},
-        'class_log_prior': dict(model.class_log_prior_),
-        'feature_log_prob': {k: dict(v) for k, v in model.feature_log_prob_.items()},
-        'classes': list(model.classes_),
-        'n_features': int(model.n_features_),
-    }
-    with open(path, 'wb') as f:
-        pickle.dump({'vocab': vectorizer.vocabulary_, 'model_state': model_state}, f)
-
-
-def load_pipeline(path):
-    with open(path, 'rb') as f:
-        data = pickle.load(f)
-    vec = SimpleCountVectorizer()
-    vec.vocabulary_ = data['vocab']
-    state = data['model_state']
-    model = MultinomialNB(alpha=state.get('alpha', 1.0))
-    model.class_count_ = Counter(state.get('class_count', {}))
-    model.feature_count_ = defaultdict(Counter, {k: Counter(v) for k, v in state.get('feature_count', {}).items()})
-    model.class_log_prior_ = dict(state.get('class_log_prior', {}))
-    model.feature_log_prob_ = defaultdict(dict, {k: dict(v) for k, v in state.get('feature_log_prob', {}).items()})
-    model.classes_ = list(state.get('classes', []))
-    model.n_features_ = int(state.get('n_features', 0))
-    return vec, model
-
-import re
-import math
-import pickle
-from collections import defaultdict, Counter
-
-class SimpleCountVectorizer:
-    """Very small tokenizer + count vectorizer.
-    - lowercases, removes non-alphanum, splits on whitespace
-    - supports fit, transform, fit_transform
-    """
-    def __init__(self, min_df=1):
-        self.min_df = min_df
-        self.vocabulary_ = {}
-        self._idf = {}
-
-    def _tokenize(self, text):
-        text = text.lower()
-        text = re.sub(r"[^a-z0-9\s]", " ", text)
-        tokens = [t for t in text.split() if t]
-        return tokens
-
-    def fit(self, documents):
-        df = Counter()
-        for doc in documents:
-            tokens = set(self._tokenize(doc))
-            for t in tokens:
-                df[t] += 1
-        # keep tokens with df >= min_df
-        idx = 0
-        for t, count in df.items():
-            if count >= self.min_df:
-                self.vocabulary_[t] = idx
-                idx += 1
-        return self
-
-    def transform(self, documents):
-        # return list of dicts: index -> count
-        rows = []
-        for doc in documents:
-            cnt = defaultdict(int)
-            for t in self._tokenize(doc):
-                if t in self.vocabulary_:
-                    cnt[self.vocabulary_[t]] += 1
-            rows.append(dict(cnt))
-        return rows
-
-    def fit_transform(self, documents):
-        self.fit(documents)
-        return self.transform(documents)
-
-class MultinomialNB:
-    """Simple Multinomial Naive Bayes with add-one smoothing."""
-    def __init__(self, alpha=1.0):
-        self.alpha = alpha
-        self.class_count_ = Counter()
-        # use Counter as the default factory (module-level callable) so pickling works
-        self.feature_count_ = defaultdict(Counter)
-        self.class_log_prior_ = {}
-        self.feature_log_prob_ = defaultdict(dict)
-        self.classes_ = []
-        self.n_features_ = 0
-
-    def fit(self, X_counts, y):
-        # X_counts: list of dict(index->count)
-        self.classes_ = sorted(set(y))
-        self.n_features_ = 0
-        for row in X_counts:
-            for idx in row.keys():
-                if idx + 1 > self.n_features_:
-                    self.n_features_ = idx + 1
-        # count features per class
-        for row, label in zip(X_counts, y):
-            self.class_count_[label] += 1
-            for idx, c in row.items():
-                self.feature_count_[label][idx] += c
-        # compute log priors
-        total = sum(self.class_count_.values())
-        for c in self.classes_:
-            self.class_log_prior_[c] = math.log(self.class_count_[c] / total)
-        # compute feature log prob with smoothing
-        for c in self.classes_:
-            # total count of all features for class
-            total_count = sum(self.feature_count_[c].values())
-            denom = total_count + self.alpha * self.n_features_
-            for idx in range(self.n_features_):
-                num = self.feature_count_[c].get(idx, 0.0) + self.alpha
-                self.feature_log_prob_[c][idx] = math.log(num / denom)
-        return self
-
-    def predict_log_proba_single(self, x_counts):
-        # returns dict class -> log-prob
-        res = {}
-        for c in self.classes_:
-            logp = self.class_log_prior_.get(c, float('-inf'))
-            for idx, cnt in x_counts.items():
-                if idx < self.n_features_:
-                    logp += self.feature_log_prob_[c].get(idx, math.log(self.alpha / (self.alpha * self.n_features_))) * cnt
-                else:
-                    # unseen feature index -> use uniform smoothing
-                    logp += math.log(self.alpha / (self.alpha * (self.n_features_ + 1))) * cnt
-            res[c] = logp
-        return res
-
-    def predict(self, X_counts):
-        preds = []
-        for row in X_counts:
-            logp = self.predict_log_proba_single(row)
-            preds.append(max(logp.items(), key=lambda x: x[1])[0])
-        return preds
-
-    def predict_proba(self, X_counts):
-        out = []
-        for row in X_counts:
-            logp = self.predict_log_proba_single(row)
-            # softmax
-            vals = list(logp.values())
-            maxv = max(vals)
-            exps = [math.exp(v - maxv) for v in vals]
-            s = sum(exps)
-            probs = [e / s for e in exps]
-            out.append({c: p for c, p in zip(self.classes_, probs)})
-        return out
-
-# helpers to save/load pipeline
-
-def save_pipeline(path, vectorizer, model):
-    # Serialize only primitive structures to avoid pickling callables
-    model_state = {
-        'alpha': model.alpha,
-        'class_count': dict(model.class_count_),
-        'feature_count': {k: dict(v) for k, v in model.feature_count_.items()},
-        'class_log_prior': dict(model.class_log_prior_),
-        'feature_log_prob': {k: dict(v) for k, v in model.feature_log_prob_.items()},
-        'classes': list(model.classes_),
-        'n_features': int(model.n_features_),
-    }
-    with open(path, 'wb') as f:
-        pickle.dump({'vocab': vectorizer.vocabulary_, 'model_state': model_state}, f)
-
-
-def load_pipeline(path):
-    with open(path, 'rb') as f:
-        data = pickle.load(f)
-    vec = SimpleCountVectorizer()
-    vec.vocabulary_ = data['vocab']
-    state = data['model_state']
-    model = MultinomialNB(alpha=state.get('alpha', 1.0))
-    model.class_count_ = Counter(state.get('class_count', {}))
-    model.feature_count_ = defaultdict(Counter, {k: Counter(v) for k, v in state.get('feature_count', {}).items()})
-    model.class_log_prior_ = dict(state.get('class_log_prior', {}))
-    model.feature_log_prob_ = defaultdict(dict, {k: dict(v) for k, v in state.get('feature_log_prob', {}).items()})
-    model.classes_ = list(state.get('classes', []))
-    model.n_features_ = int(state.get('n_features', 0))
-    return vec, model
+import os
+import re
+import math
+import zlib
+import heapq
+import pickle
+from array import array
+from operator import mul, sub, itemgetter
+from collections import defaultdict, Counter
+
+from . import metrics
+from .parallel import map_shards, resolve_n_jobs, shard_bounds
+from .vocabulary import CompactVocabulary
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; fall back to array('d')
+    np = None
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class CSRMatrix:
+    """Minimal compressed sparse row matrix of feature counts.
+
+    Row i holds indices[indptr[i]:indptr[i+1]] with matching counts in data.
+    Iterating yields one dict(index->count) per row, so it can be passed
+    anywhere the list-of-dicts format is accepted.
+    """
+    def __init__(self, data, indices, indptr, shape):
+        self.data = data
+        self.indices = indices
+        self.indptr = indptr
+        self.shape = shape
+
+    @classmethod
+    def from_rows(cls, rows, n_cols=None):
+        data = array('i')
+        indices = array('i')
+        indptr = array('q', [0])
+        max_col = 0
+        for row in rows:
+            if row:
+                indices.extend(row.keys())
+                data.extend(row.values())
+                max_col = max(max_col, max(row) + 1)
+            indptr.append(len(indices))
+        if n_cols is None:
+            n_cols = max_col
+        return cls(data, indices, indptr, (len(indptr) - 1, n_cols))
+
+    def __len__(self):
+        return self.shape[0]
+
+    def row_slice(self, start, end):
+        """Return rows start..end-1 as a new CSRMatrix."""
+        lo, hi = self.indptr[start], self.indptr[end]
+        indptr = array('q', [p - lo for p in self.indptr[start:end + 1]])
+        return CSRMatrix(self.data[lo:hi], self.indices[lo:hi], indptr, (end - start, self.shape[1]))
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.shape[0]
+        if not 0 <= i < self.shape[0]:
+            raise IndexError('row index out of range')
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return dict(zip(self.indices[start:end], self.data[start:end]))
+
+    def __iter__(self):
+        indices, data, indptr = self.indices, self.data, self.indptr
+        for i in range(self.shape[0]):
+            start, end = indptr[i], indptr[i + 1]
+            yield dict(zip(indices[start:end], data[start:end]))
+
+
+ANALYZERS = ('word', 'char_wb')
+
+
+def _word_ngrams(tokens, min_n, max_n):
+    if max_n == 1:
+        return tokens
+    grams = list(tokens) if min_n == 1 else []
+    for n in range(max(min_n, 2), max_n + 1):
+        grams.extend(' '.join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+    return grams
+
+
+def _char_wb_ngrams(words, min_n, max_n):
+    grams = []
+    for w in words:
+        w = ' ' + w + ' '
+        size = len(w)
+        for n in range(min_n, max_n + 1):
+            if n >= size:
+                # a word shorter than n is counted once, whole
+                grams.append(w)
+                break
+            grams.extend(w[i:i + n] for i in range(size - n + 1))
+    return grams
+
+
+class SimpleCountVectorizer:
+    """Very small tokenizer + count vectorizer.
+    - lowercases, removes non-alphanum, splits on whitespace
+    - supports fit, transform, fit_transform
+    - n_jobs > 1 (or -1 for all cores) shards fit/transform over processes
+    - ngram_range=(min_n, max_n) adds word n-grams ('free entry'); with
+      analyzer='char_wb' the features are instead character n-grams of
+      each whitespace-separated word, padded with a space on either side
+      (so 'fr33' and 'fr3e' still share ' fr', 'fr3', ...)
+    - fit keeps features with document frequency >= min_df, and at most
+      max_features of them (the most frequent), to bound the vocabulary
+    - compact_vocabulary() swaps the vocabulary dict for a read-only
+      CompactVocabulary, several times smaller and pickled as flat bytes
+    - keep_pending=True makes fit also keep (and save) the document
+      frequencies of the tokens below min_df, so a later partial_fit can
+      still promote them; they often outnumber the vocabulary
+    """
+    def __init__(self, min_df=1, n_jobs=None, ngram_range=(1, 1), analyzer='word', max_features=None,
+                 keep_pending=False):
+        if analyzer not in ANALYZERS:
+            raise ValueError(f"analyzer must be one of {ANALYZERS}, not {analyzer!r}")
+        min_n, max_n = ngram_range
+        if not 1 <= min_n <= max_n:
+            raise ValueError(f"invalid ngram_range {ngram_range!r}")
+        self.min_df = min_df
+        self.n_jobs = n_jobs
+        self.ngram_range = (min_n, max_n)
+        self.analyzer = analyzer
+        self.max_features = max_features
+        self.keep_pending = keep_pending
+        self.vocabulary_ = {}
+        # document frequency of tokens still below min_df (for partial_fit)
+        self.pending_df_ = Counter()
+        self._idf = {}
+
+    def _tokenize(self, text):
+        # single compiled pass: the runs of [a-z0-9] in the lowercased text are
+        # exactly the tokens left by replacing everything else with spaces
+        # and splitting on whitespace
+        return _TOKEN_RE.findall(text.lower())
+
+    def _split(self, text):
+        # the units n-grams are built from: tokens, or whole words for char_wb
+        if self.analyzer == 'char_wb':
+            return text.lower().split()
+        return self._tokenize(text)
+
+    def _grams(self, units):
+        min_n, max_n = self.ngram_range
+        if self.analyzer == 'char_wb':
+            return _char_wb_ngrams(units, min_n, max_n)
+        return _word_ngrams(units, min_n, max_n)
+
+    def _analyze(self, text):
+        """The features of one document, as strings (repeats included)."""
+        return self._grams(self._split(text))
+
+    def _normalize(self, text):
+        # two texts with the same normalized form get the same features
+        return ' '.join(self._split(text))
+
+    def _doc_freq(self, documents):
+        df = Counter()
+        for doc in documents:
+            df.update(set(self._analyze(doc)))
+        return df
+
+    def _shards(self, documents):
+        # a single shard (left as given, possibly a generator) means serial
+        if resolve_n_jobs(self.n_jobs) <= 1:
+            return [documents]
+        documents = list(documents)
+        return [documents[a:b] for a, b in shard_bounds(len(documents), self.n_jobs)]
+
+    def fit(self, documents):
+        t0 = metrics.clock()
+        parts = map_shards(_doc_freq_shard, self._shards(documents), self.n_jobs, state=self)
+        # merging in shard order keeps the serial first-seen token order
+        df = parts[0]
+        for part in parts[1:]:
+            df.update(part)
+        self._set_vocabulary(df)
+        metrics.observe('vectorizer_fit', t0)
+        return self
+
+    def fit_stream(self, batches):
+        """fit() over an iterable of document batches, holding one batch at a time.
+
+        Builds the same vocabulary fit() would on all the documents at once,
+        min_df and max_features included; partial_fit cannot, since it has
+        to decide on each token before the later batches are seen.
+        """
+        t0 = metrics.clock()
+        df = Counter()
+        for documents in batches:
+            for part in map_shards(_doc_freq_shard, self._shards(documents), self.n_jobs, state=self):
+                df.update(part)
+        self._set_vocabulary(df)
+        metrics.observe('vectorizer_fit', t0)
+        return self
+
+    def _set_vocabulary(self, df):
+        keep = None
+        if self.max_features is not None:
+            frequent = [(t, count) for t, count in df.items() if count >= self.min_df]
+            if len(frequent) > self.max_features:
+                # ties go to the first-seen feature (nlargest is stable)
+                keep = {t for t, _ in heapq.nlargest(self.max_features, frequent, key=itemgetter(1))}
+        # keep tokens with df >= min_df
+        self.vocabulary_ = {}
+        self.pending_df_ = Counter()
+        idx = 0
+        for t, count in df.items():
+            if count >= self.min_df:
+                if keep is not None and t not in keep:
+                    continue
+                self.vocabulary_[t] = idx
+                idx += 1
+            elif self.keep_pending:
+                self.pending_df_[t] = count
+
+    def compact_vocabulary(self):
+        """Store vocabulary_ as a CompactVocabulary; lookups are slower, memory much lower."""
+        if not isinstance(self.vocabulary_, CompactVocabulary):
+            self.vocabulary_ = CompactVocabulary.from_dict(self.vocabulary_)
+        return self
+
+    def partial_fit(self, documents):
+        """Grow the vocabulary with another batch of documents.
+
+        Existing indices never change: a new token is appended once its
+        document frequency over all batches seen so far reaches min_df,
+        until the vocabulary holds max_features tokens. A compact
+        vocabulary is turned back into a dict first. Tokens left below
+        min_df by fit() count from zero again unless keep_pending was set.
+
+        With min_df > 1 or max_features this is not the vocabulary fit()
+        would build: occurrences of a token in the batches before it was
+        promoted are never counted, and the cap keeps the first tokens to
+        qualify rather than the most frequent. Use fit_stream for that.
+        """
+        if not isinstance(self.vocabulary_, dict):
+            self.vocabulary_ = dict(self.vocabulary_.items())
+        vocab = self.vocabulary_
+        pending = self.pending_df_
+        cap = self.max_features
+        for doc in documents:
+            for t in set(self._analyze(doc)):
+                if t in vocab:
+                    continue
+                if cap is not None and len(vocab) >= cap:
+                    break
+                count = pending[t] + 1
+                if count >= self.min_df:
+                    vocab[t] = len(vocab)
+                    del pending[t]
+                else:
+                    pending[t] = count
+        return self
+
+    def transform(self, documents):
+        # return list of dicts: index -> count
+        parts = map_shards(_transform_shard, self._shards(documents), self.n_jobs, state=self)
+        if len(parts) == 1:
+            return parts[0]
+        return [row for part in parts for row in part]
+
+    def _transform(self, documents):
+        if metrics.enabled:
+            # two passes, so tokenizing and counting are timed separately
+            t0 = metrics.clock()
+            token_lists = [self._split(doc) for doc in documents]
+            metrics.observe('tokenize', t0)
+            t0 = metrics.clock()
+            rows = self._count_rows(token_lists)
+            metrics.observe('vectorize', t0)
+            return rows
+        return self._count_rows(self._split(doc) for doc in documents)
+
+    def _count_rows(self, token_lists):
+        vocab = self.vocabulary_
+        grams = self._grams
+        rows = []
+        for tokens in token_lists:
+            cnt = {}
+            for t in grams(tokens):
+                idx = vocab.get(t)
+                if idx is not None:
+                    cnt[idx] = cnt.get(idx, 0) + 1
+            rows.append(cnt)
+        return rows
+
+    def transform_csr(self, documents):
+        """Like transform, but return a CSRMatrix with one row per document."""
+        return CSRMatrix.from_rows(self.transform(documents), n_cols=len(self.vocabulary_))
+
+    def fit_transform(self, documents):
+        self.fit(documents)
+        return self.transform(documents)
+
+
+class HashingVectorizer(SimpleCountVectorizer):
+    """Count vectorizer over a fixed feature space of 2**n_bits buckets.
+    - same tokenization and n-gram options as SimpleCountVectorizer
+    - tokens are bucketed with crc32, which is stable across processes
+      (unlike the salted built-in hash), so no vocabulary is stored
+    - n-grams are hashed without building their strings: crc32 is chained
+      over the tokens of a word n-gram and run over memoryview slices of
+      each padded word for char n-grams; the bucket is the same as that of
+      the joined string, so unigram models are unchanged
+    - fit is a no-op; the model size does not grow with the corpus
+    """
+    def __init__(self, n_bits=18, n_jobs=None, ngram_range=(1, 1), analyzer='word'):
+        super().__init__(n_jobs=n_jobs, ngram_range=ngram_range, analyzer=analyzer)
+        self.n_bits = n_bits
+        self.n_features = 1 << n_bits
+
+    def fit(self, documents):
+        return self
+
+    def fit_stream(self, batches):
+        return self
+
+    def partial_fit(self, documents):
+        return self
+
+    def _count_rows(self, token_lists):
+        if self.analyzer == 'char_wb':
+            hash_units = self._hash_char_wb
+        else:
+            hash_units = self._hash_words
+        mask = self.n_features - 1
+        rows = []
+        for tokens in token_lists:
+            cnt = {}
+            for h in hash_units(tokens):
+                idx = h & mask
+                cnt[idx] = cnt.get(idx, 0) + 1
+            rows.append(cnt)
+        return rows
+
+    def _hash_words(self, tokens):
+        crc32 = zlib.crc32
+        min_n, max_n = self.ngram_range
+        encoded = [t.encode('utf-8') for t in tokens]
+        if max_n == 1:
+            return [crc32(t) for t in encoded]
+        hashes = []
+        end = len(encoded)
+        for i in range(end):
+            # crc32(b, crc32(a)) == crc32(a + b): extend one token at a time
+            h = crc32(encoded[i])
+            if min_n == 1:
+                hashes.append(h)
+            for n in range(2, min(max_n, end - i) + 1):
+                h = crc32(encoded[i + n - 1], crc32(b' ', h))
+                if n >= min_n:
+                    hashes.append(h)
+        return hashes
+
+    def _hash_char_wb(self, words):
+        crc32 = zlib.crc32
+        min_n, max_n = self.ngram_range
+        hashes = []
+        for w in words:
+            w = ' ' + w + ' '
+            size = len(w)
+            raw = w.encode('utf-8')
+            for n in range(min_n, max_n + 1):
+                if n >= size:
+                    hashes.append(crc32(raw))
+                    break
+                if len(raw) == size:
+                    # ASCII: byte offsets are character offsets, slice without copying
+                    view = memoryview(raw)
+                    hashes.extend(crc32(view[i:i + n]) for i in range(size - n + 1))
+                else:
+                    hashes.extend(crc32(w[i:i + n].encode('utf-8')) for i in range(size - n + 1))
+        return hashes
+
+    def transform_csr(self, documents):
+        return CSRMatrix.from_rows(self.transform(documents), n_cols=self.n_features)
+
+def _doc_freq_shard(vectorizer, documents):
+    return vectorizer._doc_freq(documents)
+
+
+def _transform_shard(vectorizer, documents):
+    return vectorizer._transform(documents)
+
+
+def _accumulate_counts(class_count, feature_count, X_counts, y, n_features=0):
+    # count features per class; returns the updated number of features
+    for row, label in zip(X_counts, y):
+        class_count[label] += 1
+        counts = feature_count[label]
+        for idx, c in row.items():
+            counts[idx] += c
+            if idx + 1 > n_features:
+                n_features = idx + 1
+    return n_features
+
+
+def _count_shard(_, shard):
+    X_counts, y = shard
+    class_count = Counter()
+    feature_count = defaultdict(Counter)
+    n_features = _accumulate_counts(class_count, feature_count, X_counts, y)
+    return class_count, feature_count, n_features
+
+
+class MultinomialNB:
+    """Simple Multinomial Naive Bayes with add-one smoothing.
+
+    n_jobs > 1 (or -1 for all cores) shards the counting in fit/partial_fit
+    over processes and sums the per-shard tables.
+    """
+    def __init__(self, alpha=1.0, n_jobs=None):
+        self.alpha = alpha
+        self.n_jobs = n_jobs
+        self.class_count_ = Counter()
+        # use Counter as the default factory (module-level callable) so pickling works
+        self.feature_count_ = defaultdict(Counter)
+        self.class_log_prior_ = {}
+        # log-probs are stored sparsely: feature_log_prob_[c] only holds the
+        # indices class c has counts for, every other index in the vocabulary
+        # scores default_log_prob_[c]
+        self.feature_log_prob_ = defaultdict(dict)
+        self.default_log_prob_ = {}
+        self.classes_ = []
+        self.n_features_ = 0
+        self._stale = False
+        # set by loaders that fill feature_count_/feature_log_prob_ on first use
+        self._deferred = None
+        self._compiled = None
+
+    def fit(self, X_counts, y):
+        # X_counts: list of dict(index->count)
+        self._deferred = None
+        self.class_count_ = Counter()
+        self.feature_count_ = defaultdict(Counter)
+        self.classes_ = []
+        self.n_features_ = 0
+        return self.partial_fit(X_counts, y)
+
+    def partial_fit(self, X_counts, y):
+        """Fold another batch of labelled rows into the fitted counts.
+
+        New classes and feature indices are picked up as they appear, then
+        the log priors and log-probs are recomputed from the running counts.
+        """
+        t0 = metrics.clock()
+        shards = None
+        if resolve_n_jobs(self.n_jobs) > 1:
+            y = list(y)
+            bounds = shard_bounds(len(y), self.n_jobs)
+            if len(bounds) > 1:
+                if isinstance(X_counts, CSRMatrix):
+                    shards = [(X_counts.row_slice(a, b), y[a:b]) for a, b in bounds]
+                else:
+                    X_counts = list(X_counts)
+                    shards = [(X_counts[a:b], y[a:b]) for a, b in bounds]
+        if shards is None:
+            self.n_features_ = _accumulate_counts(self.class_count_, self.feature_count_, X_counts, y, self.n_features_)
+        else:
+            for class_count, feature_count, n_features in map_shards(_count_shard, shards, self.n_jobs):
+                self.class_count_.update(class_count)
+                for label, counts in feature_count.items():
+                    self.feature_count_[label].update(counts)
+                self.n_features_ = max(self.n_features_, n_features)
+        self.classes_ = sorted(self.class_count_)
+        # log-probs are recomputed on first use, so a stream of partial_fit
+        # calls pays for them once rather than once per batch
+        self._stale = True
+        self._compiled = None
+        metrics.observe('nb_fit', t0)
+        return self
+
+    def _load_deferred(self):
+        if self._deferred is not None:
+            load, self._deferred = self._deferred, None
+            load(self)
+
+    @property
+    def feature_count_(self):
+        self._load_deferred()
+        return self._feature_count
+
+    @feature_count_.setter
+    def feature_count_(self, value):
+        self._feature_count = value
+
+    @property
+    def class_log_prior_(self):
+        if self._stale:
+            self._update_log_probs()
+        return self._class_log_prior
+
+    @class_log_prior_.setter
+    def class_log_prior_(self, value):
+        self._class_log_prior = value
+
+    @property
+    def feature_log_prob_(self):
+        self._load_deferred()
+        if self._stale:
+            self._update_log_probs()
+        return self._feature_log_prob
+
+    @feature_log_prob_.setter
+    def feature_log_prob_(self, value):
+        self._feature_log_prob = value
+
+    @property
+    def default_log_prob_(self):
+        if self._stale:
+            self._update_log_probs()
+        return self._default_log_prob
+
+    @default_log_prob_.setter
+    def default_log_prob_(self, value):
+        self._default_log_prob = value
+
+    def _update_log_probs(self):
+        self._stale = False
+        alpha = self.alpha
+        log = math.log
+        # compute log priors
+        total = sum(self.class_count_.values())
+        self.class_log_prior_ = {}
+        for c in self.classes_:
+            self.class_log_prior_[c] = log(self.class_count_[c] / total)
+        # compute feature log prob with smoothing, for observed features only
+        self.feature_log_prob_ = defaultdict(dict)
+        self.default_log_prob_ = {}
+        for c in self.classes_:
+            counts = self.feature_count_[c]
+            # total count of all features for class
+            total_count = sum(counts.values())
+            denom = total_count + alpha * self.n_features_
+            if not denom:
+                # empty vocabulary (no document had a token): nothing to score
+                self.feature_log_prob_[c] = {}
+                self.default_log_prob_[c] = 0.0
+                continue
+            self.feature_log_prob_[c] = {idx: log((n + alpha) / denom) for idx, n in counts.items()}
+            self.default_log_prob_[c] = log(alpha / denom)
+        self._compiled = None
+
+    def __getstate__(self):
+        # memory-mapped tables cannot be pickled; drop them and rebuild on use
+        self._load_deferred()
+        state = self.__dict__.copy()
+        state['_compiled'] = None
+        return state
+
+    def compile(self):
+        """(Re)build the dense scoring tables from the fitted attributes.
+
+        Called lazily by the predict methods; call it again yourself if you
+        modify the fitted attributes by hand.
+        """
+        t0 = metrics.clock()
+        self._compiled = CompiledNB.from_model(self)
+        metrics.observe('compile', t0)
+        return self._compiled
+
+    def _get_compiled(self):
+        if self._compiled is None:
+            return self.compile()
+        return self._compiled
+
+    def predict_log_proba_single(self, x_counts):
+        # returns dict class -> log-prob
+        compiled = self._get_compiled()
+        t0 = metrics.clock()
+        result = dict(zip(compiled.classes, compiled.log_proba_single(x_counts)))
+        metrics.observe('score', t0)
+        return result
+
+    def predict(self, X_counts):
+        """Return the most likely class of each row.
+
+        Two-class models only need the sign of the log-odds, which takes one
+        weight per feature rather than one per class. Use
+        predict_proba/predict_batch when the probabilities themselves are
+        needed.
+        """
+        compiled = self._get_compiled()
+        t0 = metrics.clock()
+        classes = compiled.classes
+        if len(classes) == 2:
+            negative, positive = classes
+            preds = [positive if s > 0 else negative for s in compiled.log_odds_batch(X_counts)]
+        else:
+            preds = []
+            for vals in compiled.log_proba_batch(X_counts):
+                preds.append(classes[max(range(len(vals)), key=vals.__getitem__)])
+        metrics.observe('score', t0)
+        return preds
+
+    def predict_log_odds(self, X_counts):
+        """log P(classes_[1] | x) - log P(classes_[0] | x) per row, for two-class models."""
+        return self._get_compiled().log_odds_batch(X_counts)
+
+    def predict_proba(self, X_counts):
+        compiled = self._get_compiled()
+        t0 = metrics.clock()
+        probs = [dict(zip(compiled.classes, _softmax(vals))) for vals in compiled.log_proba_batch(X_counts)]
+        metrics.observe('score', t0)
+        return probs
+
+    def predict_batch(self, X_counts):
+        """Score a batch in one pass.
+
+        X_counts may be a CSRMatrix or a list of dict(index->count).
+        Returns (labels, log_probs, probs), where log_probs and probs are
+        lists of dict(class->value), so callers that need both the label
+        and the probabilities do not score every row twice.
+        """
+        compiled = self._get_compiled()
+        t0 = metrics.clock()
+        classes = compiled.classes
+        labels = []
+        log_probs = []
+        probs = []
+        for vals in compiled.log_proba_batch(X_counts):
+            labels.append(classes[max(range(len(vals)), key=vals.__getitem__)])
+            log_probs.append(dict(zip(classes, vals)))
+            probs.append(dict(zip(classes, _softmax(vals))))
+        metrics.observe('score', t0)
+        return labels, log_probs, probs
+
+
+def _softmax(vals):
+    maxv = max(vals)
+    exps = [math.exp(v - maxv) for v in vals]
+    s = sum(exps)
+    return [e / s for e in exps]
+
+class CompiledNB:
+    """Dense scoring tables compiled from a fitted MultinomialNB.
+
+    - one contiguous weight vector per class (a 2-D numpy array when numpy is
+      installed, otherwise a list of array('d'))
+    - class log-priors and the log-prob used for indices >= n_features
+    Scoring a message is a single gather-and-sum over its feature indices.
+    Two-class models can also be scored by log-odds alone (log_odds_*),
+    one weight per feature instead of one per class.
+    """
+    def __init__(self, classes, priors, weights, unseen_log_prob, n_features):
+        self.classes = list(classes)
+        self.priors = priors
+        self.weights = weights
+        self.unseen_log_prob = unseen_log_prob
+        self.n_features = n_features
+        self._odds_tables = None
+
+    @classmethod
+    def from_model(cls, model):
+        n = model.n_features_
+        alpha = model.alpha
+        classes = list(model.classes_)
+        priors = [model.class_log_prior_.get(c, float('-inf')) for c in classes]
+        # index inside the vocabulary the class has no entry for; pipelines
+        # saved with dense log-probs have no defaults recorded
+        fallback = math.log(alpha / (alpha * n)) if n else 0.0
+        missing = [model.default_log_prob_.get(c, fallback) for c in classes]
+        # index outside the vocabulary -> uniform smoothing
+        unseen = math.log(alpha / (alpha * (n + 1)))
+        if np is not None:
+            weights = np.empty((len(classes), n), dtype=np.float64)
+            for row, c, default in zip(weights, classes, missing):
+                row.fill(default)
+                probs = model.feature_log_prob_.get(c, {})
+                idx = np.fromiter((i for i in probs if i < n), dtype=np.intp)
+                row[idx] = np.fromiter((probs[i] for i in idx.tolist()), dtype=np.float64, count=len(idx))
+            priors = np.array(priors, dtype=np.float64)
+        else:
+            weights = []
+            for c, default in zip(classes, missing):
+                row = array('d', [default]) * n
+                for i, v in model.feature_log_prob_.get(c, {}).items():
+                    if i < n:
+                        row[i] = v
+                weights.append(row)
+        return cls(classes, priors, weights, unseen, n)
+
+    def _gather(self, x_counts):
+        # split a row into in-vocabulary (indices, counts) and an OOV count
+        n = self.n_features
+        idxs = []
+        cnts = []
+        oov = 0
+        for idx, cnt in x_counts.items():
+            if idx < n:
+                idxs.append(idx)
+                cnts.append(cnt)
+            else:
+                oov += cnt
+        return idxs, cnts, oov
+
+    def log_proba_single(self, x_counts):
+        """Return the joint log-likelihood of one row, as a list in class order."""
+        idxs, cnts, oov = self._gather(x_counts)
+        extra = self.unseen_log_prob * oov
+        if np is not None:
+            scores = self.priors + self.weights[:, idxs] @ np.asarray(cnts, dtype=np.float64)
+            return [v + extra for v in scores.tolist()]
+        res = []
+        for prior, w in zip(self.priors, self.weights):
+            res.append(prior + sum(map(mul, map(w.__getitem__, idxs), cnts)) + extra)
+        return res
+
+    def log_proba_batch(self, X_counts):
+        """Return one list of per-class log-likelihoods per row.
+
+        With numpy and a CSRMatrix the whole batch is scored as a single
+        sparse-dense product; otherwise rows are scored one at a time.
+        """
+        if np is None or not isinstance(X_counts, CSRMatrix):
+            return [self.log_proba_single(row) for row in X_counts]
+        n_rows = X_counts.shape[0]
+        if n_rows == 0:
+            return []
+        indices = np.asarray(X_counts.indices, dtype=np.intp)
+        data = np.asarray(X_counts.data, dtype=np.float64)
+        row_ids = np.repeat(np.arange(n_rows), np.diff(np.asarray(X_counts.indptr)))
+        known = indices < self.n_features
+        known_rows = row_ids[known]
+        known_idx = indices[known]
+        known_data = data[known]
+        oov = np.bincount(row_ids[~known], weights=data[~known], minlength=n_rows)
+        scores = np.empty((len(self.classes), n_rows), dtype=np.float64)
+        for ci, w in enumerate(self.weights):
+            scores[ci] = np.bincount(known_rows, weights=w[known_idx] * known_data, minlength=n_rows)
+        scores += self.priors[:, None]
+        scores += self.unseen_log_prob * oov
+        return scores.T.tolist()
+
+    def _odds(self):
+        # (prior difference, per-feature weight difference), built on first
+        # use: memory-mapped models that never take this path do not pay for
+        # a second weight vector
+        if self._odds_tables is None:
+            if len(self.classes) != 2:
+                raise ValueError('log-odds scoring needs a two-class model')
+            w0, w1 = self.weights[0], self.weights[1]
+            if np is not None and isinstance(self.weights, np.ndarray):
+                delta = w1 - w0
+            else:
+                delta = array('d', map(sub, w1, w0))
+            self._odds_tables = (float(self.priors[1] - self.priors[0]), delta)
+        return self._odds_tables
+
+    def log_odds_single(self, x_counts):
+        """Return log P(classes[1] | x) - log P(classes[0] | x).
+
+        Out-of-vocabulary counts add the same log-prob to both classes, so
+        they cancel.
+        """
+        prior, delta = self._odds()
+        idxs, cnts, _ = self._gather(x_counts)
+        # a plain loop beats a numpy gather for the few features of one message
+        return float(prior + sum(map(mul, map(delta.__getitem__, idxs), cnts)))
+
+    def log_odds_batch(self, X_counts):
+        """log_odds_single for every row; one sparse product for numpy + CSRMatrix."""
+        if np is None or not isinstance(X_counts, CSRMatrix):
+            return [self.log_odds_single(row) for row in X_counts]
+        prior, delta = self._odds()
+        n_rows = X_counts.shape[0]
+        if n_rows == 0:
+            return []
+        indices = np.asarray(X_counts.indices, dtype=np.intp)
+        data = np.asarray(X_counts.data, dtype=np.float64)
+        row_ids = np.repeat(np.arange(n_rows), np.diff(np.asarray(X_counts.indptr)))
+        known = indices < self.n_features
+        scores = np.bincount(row_ids[known], weights=delta[indices[known]] * data[known], minlength=n_rows)
+        return (scores + prior).tolist()
+
+
+# helpers to save/load pipeline
+
+def _vectorizer_state(vectorizer, pending=True):
+    # pending=False leaves pending_df_ to the caller (binary files give it a section)
+    features = {'ngram_range': list(vectorizer.ngram_range), 'analyzer': vectorizer.analyzer}
+    if isinstance(vectorizer, HashingVectorizer):
+        return {'type': 'hashing', 'n_bits': vectorizer.n_bits, **features}
+    state = {'type': 'count', 'min_df': vectorizer.min_df, 'max_features': vectorizer.max_features,
+             'keep_pending': vectorizer.keep_pending, **features}
+    if pending and vectorizer.pending_df_:
+        state['pending_df'] = dict(vectorizer.pending_df_)
+    return state
+
+
+def _vectorizer_from_state(state, vocab):
+    # pipelines saved before the vectorizer state was recorded are count-based
+    # unigram models; those saved before n-grams have no feature settings
+    features = {'ngram_range': tuple(state.get('ngram_range', (1, 1))), 'analyzer': state.get('analyzer', 'word')}
+    if state.get('type') == 'hashing':
+        return HashingVectorizer(n_bits=state['n_bits'], **features)
+    vec = SimpleCountVectorizer(min_df=state.get('min_df', 1), max_features=state.get('max_features'),
+                                keep_pending=state.get('keep_pending', False), **features)
+    vec.vocabulary_ = vocab
+    vec.pending_df_ = Counter(state.get('pending_df', {}))
+    return vec
+
+
+def save_pipeline(path, vectorizer, model, format='pickle'):
+    """Save a fitted vectorizer and model to path.
+
+    format='pickle' writes the nested-dict pickle; format='binary' writes
+    the flat, memory-mappable layout from sms_spam_detector.modelfile.
+    load_pipeline detects which one it is reading.
+    """
+    if format == 'binary':
+        from .modelfile import save_binary
+        save_binary(path, vectorizer, model)
+        return
+    if format != 'pickle':
+        raise ValueError(f"unknown model format: {format!r}")
+    # Serialize only primitive structures to avoid pickling callables
+    model_state = {
+        'alpha': model.alpha,
+        'class_count': dict(model.class_count_),
+        'feature_count': {k: dict(v) for k, v in model.feature_count_.items()},
+        'class_log_prior': dict(model.class_log_prior_),
+        'feature_log_prob': {k: dict(v) for k, v in model.feature_log_prob_.items()},
+        'default_log_prob': dict(model.default_log_prob_),
+        'classes': list(model.classes_),
+        'n_features': int(model.n_features_),
+    }
+    data = {
+        'vocab': vectorizer.vocabulary_,
+        'vectorizer': _vectorizer_state(vectorizer),
+        'model_state': model_state,
+    }
+    # write alongside the old file and rename over it, so a concurrent
+    # loader sees either the old pipeline or the new one, never half a file
+    tmp = f'{path}.tmp{os.getpid()}'
+    with open(tmp, 'wb') as f:
+        pickle.dump(data, f)
+    os.replace(tmp, path)
+
+
+def load_pipeline(path):
+    t0 = metrics.clock()
+    pipeline = _load_pipeline(path)
+    metrics.observe('model_load', t0)
+    return pipeline
+
+
+def _load_pipeline(path):
+    from .modelfile import MAGIC, load_binary
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) == MAGIC:
+            return load_binary(path)
+        f.seek(0)
+        data = pickle.load(f)
+    vec = _vectorizer_from_state(data.get('vectorizer', {}), data['vocab'])
+    state = data['model_state']
+    model = MultinomialNB(alpha=state.get('alpha', 1.0))
+    model.class_count_ = Counter(state.get('class_count', {}))
+    model.feature_count_ = defaultdict(Counter, {k: Counter(v) for k, v in state.get('feature_count', {}).items()})
+    model.class_log_prior_ = dict(state.get('class_log_prior', {}))
+    model.feature_log_prob_ = defaultdict(dict, {k: dict(v) for k, v in state.get('feature_log_prob', {}).items()})
+    model.default_log_prob_ = dict(state.get('default_log_prob', {}))
+    model.classes_ = list(state.get('classes', []))
+    model.n_features_ = int(state.get('n_features', 0))
+    return vec, model
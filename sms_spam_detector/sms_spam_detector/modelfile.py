@@ -0,0 +1,192 @@
+"""Flat, memory-mappable model file format.
+
+Layout (all integers little-endian):
+- 8-byte magic, uint32 format version, uint32 header length
+- UTF-8 JSON header: vectorizer state, class statistics and a table of
+  sections as (offset, length) relative to the first section
+- 8-byte aligned sections:
+    vocab          tokens in index order, joined by newlines
+    vocab_table    (version 2, instead of vocab) a CompactVocabulary's
+                   to_bytes(), used in place from the mapped file
+    weights        float64 [n_classes x n_features] log-prob matrix
+    count_indptr   int64 [n_classes + 1] row pointers into the two below
+    count_indices  int32 feature indices with a non-zero count
+    count_data     float64 the matching counts
+    pending_tokens (optional) tokens below min_df, joined by newlines
+    pending_df     int64 their document frequencies
+
+load_binary maps the file read-only and scores straight from the weights
+section, so processes loading the same file share its pages. The counts
+are only decoded if something needs them (partial_fit, re-saving).
+The pending sections are only written for a vectorizer that tracks
+tokens below min_df (keep_pending, or grown by partial_fit), and are kept
+out of the JSON header that every load parses.
+Files without a vocab_table are still written as version 1.
+"""
+import os
+import json
+import mmap
+import math
+import struct
+from array import array
+from collections import defaultdict, Counter
+
+from .model import (CompiledNB, MultinomialNB, np,
+                    _vectorizer_state, _vectorizer_from_state)
+from .vocabulary import CompactVocabulary, _le_bytes, _le_view
+
+MAGIC = b'SMSNBBIN'
+FORMAT_VERSION = 2
+_PREAMBLE = struct.Struct('<II')
+_ALIGN = 8
+
+
+def _pad(n):
+    return -n % _ALIGN
+
+
+def _weight_rows(compiled):
+    if np is not None and isinstance(compiled.weights, np.ndarray):
+        return [np.ascontiguousarray(row, dtype='<f8').tobytes() for row in compiled.weights]
+    return [_le_bytes(array('d', row)) for row in compiled.weights]
+
+
+def save_binary(path, vectorizer, model):
+    compiled = model._get_compiled()
+    classes = list(model.classes_)
+    sections = []
+
+    version = 1
+    vocab = getattr(vectorizer, 'vocabulary_', None) or {}
+    if isinstance(vocab, CompactVocabulary):
+        sections.append(('vocab_table', vocab.to_bytes()))
+        version = 2
+    elif vocab:
+        tokens = sorted(vocab, key=vocab.__getitem__)
+        if [vocab[t] for t in tokens] != list(range(len(tokens))):
+            raise ValueError('vocabulary indices must be 0..n-1 to be stored in binary form')
+        if any('\n' in t for t in tokens):
+            raise ValueError('vocabulary tokens may not contain newlines in binary form')
+        sections.append(('vocab', '\n'.join(tokens).encode('utf-8')))
+
+    sections.append(('weights', b''.join(_weight_rows(compiled))))
+
+    indptr = array('q', [0])
+    indices = array('i')
+    data = array('d')
+    for c in classes:
+        counts = model.feature_count_.get(c, {})
+        indices.extend(counts.keys())
+        data.extend(counts.values())
+        indptr.append(len(indices))
+    sections.append(('count_indptr', _le_bytes(indptr)))
+    sections.append(('count_indices', _le_bytes(indices)))
+    sections.append(('count_data', _le_bytes(data)))
+
+    pending = getattr(vectorizer, 'pending_df_', None)
+    if pending:
+        sections.append(('pending_tokens', '\n'.join(pending).encode('utf-8')))
+        sections.append(('pending_df', _le_bytes(array('q', pending.values()))))
+
+    table = {}
+    offset = 0
+    for name, blob in sections:
+        table[name] = [offset, len(blob)]
+        offset += len(blob) + _pad(len(blob))
+
+    header = {
+        'vectorizer': _vectorizer_state(vectorizer, pending=False),
+        'n_vocab': len(vocab),
+        'alpha': model.alpha,
+        'classes': classes,
+        'class_count': [model.class_count_[c] for c in classes],
+        'class_log_prior': [model.class_log_prior_[c] for c in classes],
+        'default_log_prob': [model.default_log_prob_.get(c) for c in classes],
+        'n_features': int(model.n_features_),
+        'sections': table,
+    }
+    header_bytes = json.dumps(header).encode('utf-8')
+    # never truncate a file that may be memory-mapped by a running loader:
+    # write alongside it and rename over it
+    tmp = f'{path}.tmp{os.getpid()}'
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC)
+        f.write(_PREAMBLE.pack(version, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b'\0' * _pad(len(MAGIC) + _PREAMBLE.size + len(header_bytes)))
+        for name, blob in sections:
+            f.write(blob)
+            f.write(b'\0' * _pad(len(blob)))
+    os.replace(tmp, path)
+
+
+def _section(view, base, table, name, typecode):
+    offset, length = table[name]
+    sub = view[base + offset:base + offset + length]
+    if typecode is None:
+        return sub
+    return _le_view(sub, typecode)
+
+
+def load_binary(path):
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mm[:len(MAGIC)] != MAGIC:
+        raise ValueError(f'{path} is not a binary model file')
+    version, header_len = _PREAMBLE.unpack_from(mm, len(MAGIC))
+    if version > FORMAT_VERSION:
+        raise ValueError(f'unsupported model file version {version} (expected <= {FORMAT_VERSION})')
+    start = len(MAGIC) + _PREAMBLE.size
+    header = json.loads(mm[start:start + header_len].decode('utf-8'))
+    base = start + header_len
+    base += _pad(base)
+    table = header['sections']
+    view = memoryview(mm)
+
+    vocab = {}
+    if 'vocab_table' in table:
+        vocab = CompactVocabulary.from_bytes(_section(view, base, table, 'vocab_table', None), copy=False)
+    elif 'vocab' in table:
+        tokens = bytes(_section(view, base, table, 'vocab', None)).decode('utf-8').split('\n')
+        vocab = dict(zip(tokens, range(len(tokens))))
+    vec = _vectorizer_from_state(header['vectorizer'], vocab)
+    if 'pending_tokens' in table:
+        tokens = bytes(_section(view, base, table, 'pending_tokens', None)).decode('utf-8').split('\n')
+        vec.pending_df_ = Counter(dict(zip(tokens, _section(view, base, table, 'pending_df', 'q'))))
+
+    classes = header['classes']
+    n = header['n_features']
+    model = MultinomialNB(alpha=header['alpha'])
+    model.classes_ = list(classes)
+    model.n_features_ = n
+    model.class_count_ = Counter(dict(zip(classes, header['class_count'])))
+    model.class_log_prior_ = dict(zip(classes, header['class_log_prior']))
+    model.default_log_prob_ = {c: v for c, v in zip(classes, header['default_log_prob']) if v is not None}
+
+    weights = _section(view, base, table, 'weights', 'd')
+    if np is not None:
+        matrix = np.frombuffer(weights, dtype=np.float64).reshape(len(classes), n)
+        priors = np.array(header['class_log_prior'], dtype=np.float64)
+    else:
+        matrix = [weights[i * n:(i + 1) * n] for i in range(len(classes))]
+        priors = list(header['class_log_prior'])
+    alpha = model.alpha
+    unseen = math.log(alpha / (alpha * (n + 1)))
+    model._compiled = CompiledNB(classes, priors, matrix, unseen, n)
+
+    def load_counts(m):
+        indptr = _section(view, base, table, 'count_indptr', 'q')
+        indices = _section(view, base, table, 'count_indices', 'i')
+        data = _section(view, base, table, 'count_data', 'd')
+        feature_count = defaultdict(Counter)
+        feature_log_prob = defaultdict(dict)
+        for ci, c in enumerate(classes):
+            idx = indices[indptr[ci]:indptr[ci + 1]].tolist()
+            feature_count[c] = Counter(dict(zip(idx, data[indptr[ci]:indptr[ci + 1]].tolist())))
+            row = matrix[ci]
+            feature_log_prob[c] = {i: float(row[i]) for i in idx if i < n}
+        m.feature_count_ = feature_count
+        m.feature_log_prob_ = feature_log_prob
+
+    model._deferred = load_counts
+    return vec, model
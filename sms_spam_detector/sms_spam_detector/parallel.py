@@ -0,0 +1,47 @@
+"""Process-pool helpers for sharding corpus work across cores."""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# below this many items per shard the pool costs more than it saves
+MIN_SHARD_SIZE = 1000
+
+_state = None
+
+
+def resolve_n_jobs(n_jobs):
+    """Map an n_jobs setting to a worker count: None -> 1, -1 -> all cores."""
+    if n_jobs is None:
+        return 1
+    if n_jobs < 0:
+        return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    return max(1, n_jobs)
+
+
+def shard_bounds(n_items, n_jobs):
+    """Split range(n_items) into at most n_jobs contiguous (start, end) pairs."""
+    n_shards = max(1, min(resolve_n_jobs(n_jobs), n_items // MIN_SHARD_SIZE))
+    step = -(-n_items // n_shards)
+    return [(i, min(i + step, n_items)) for i in range(0, n_items, step)] or [(0, 0)]
+
+
+def _init_worker(state):
+    global _state
+    _state = state
+
+
+def _run(func, shard):
+    return func(_state, shard)
+
+
+def map_shards(func, shards, n_jobs, state=None):
+    """Return [func(state, shard) for shard in shards], one shard per process.
+
+    state is sent to each worker once (not once per shard); results come
+    back in shard order so callers can merge them deterministically. func
+    must be a module-level function so it can be pickled.
+    """
+    if len(shards) <= 1 or resolve_n_jobs(n_jobs) <= 1:
+        return [func(state, shard) for shard in shards]
+    workers = min(resolve_n_jobs(n_jobs), len(shards))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(state,)) as pool:
+        return list(pool.map(_run, [func] * len(shards), shards))
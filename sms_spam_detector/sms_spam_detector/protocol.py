@@ -0,0 +1,93 @@
+"""Length-prefixed JSON framing spoken by daemon.py and its clients.
+
+A frame is a 4-byte big-endian payload length followed by that many bytes
+of UTF-8 JSON. A connection may carry any number of request/reply pairs.
+Requests look like {"model": path, "messages": [...]}; replies are
+{"results": [{"predicted": label, "probs": {class: p}}, ...]} or
+{"error": text}. This module only imports the standard library, so a
+client that never needs the model in-process starts quickly.
+
+The default socket is per user ($XDG_RUNTIME_DIR, else the uid is in the
+name), and request() only trusts a daemon run by the same user: anyone
+could otherwise bind the path first and answer every query.
+"""
+import os
+import json
+import socket
+import struct
+
+
+
+def _default_socket():
+    runtime = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime:
+        return os.path.join(runtime, 'sms-spam-detector.sock')
+    return os.path.join(os.environ.get('TMPDIR', '/tmp'), f'sms-spam-detector-{os.getuid()}.sock')
+
+
+DEFAULT_SOCKET = _default_socket()
+# refuse anything larger than this instead of trying to allocate it
+MAX_FRAME = 64 << 20
+
+_LENGTH = struct.Struct('>I')
+# struct ucred: pid, uid, gid
+_CREDS = struct.Struct('3i')
+
+
+def send_frame(sock, obj):
+    body = json.dumps(obj).encode('utf-8')
+    sock.sendall(_LENGTH.pack(len(body)) + body)
+
+
+def _recv_exact(sock, n):
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            if buf:
+                raise ConnectionError('connection closed mid-frame')
+            return None
+        buf += chunk
+    return bytes(buf)
+
+
+def recv_frame(sock):
+    """Return the next decoded frame, or None if the peer closed the connection."""
+    head = _recv_exact(sock, _LENGTH.size)
+    if head is None:
+        return None
+    (length,) = _LENGTH.unpack(head)
+    if length > MAX_FRAME:
+        raise ValueError(f'frame of {length} bytes exceeds the {MAX_FRAME} byte limit')
+    body = _recv_exact(sock, length) if length else b''
+    if body is None:
+        raise ConnectionError('connection closed mid-frame')
+    return json.loads(body.decode('utf-8'))
+
+
+def peer_uid(sock, path):
+    """The uid of the process at the other end of a connected Unix socket."""
+    if hasattr(socket, 'SO_PEERCRED'):
+        creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, _CREDS.size)
+        return _CREDS.unpack(creds)[1]
+    # no peer credentials on this platform: trust the owner of the socket file
+    return os.stat(path).st_uid
+
+
+def request(path, payload, timeout=None):
+    """Send one request to the daemon listening at path and return its reply.
+
+    Raises OSError (FileNotFoundError, ConnectionRefusedError, timeout...)
+    when no daemon answers, and PermissionError when the daemon belongs
+    to another user.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        if peer_uid(sock, path) != os.getuid():
+            raise PermissionError(f'{path} is served by another user')
+        send_frame(sock, payload)
+        reply = recv_frame(sock)
+    if reply is None:
+        raise ConnectionError('daemon closed the connection without replying')
+    return reply
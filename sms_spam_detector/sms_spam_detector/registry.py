@@ -0,0 +1,174 @@
+"""Several named pipelines served from one process.
+
+ModelRegistry maps model names to files, loads each on first use and keeps
+at most max_resident of them in memory, dropping the least recently used
+one when another is needed. Models trained on similar corpora mostly share
+their vocabulary, so count-vectorizer vocabularies are not kept as one dict
+per model: every token string lives once in a VocabularyPool with a global
+id, and each model only keeps an array('i') from global id to its own
+feature index (-1 when the model lacks the token). The price is a second
+lookup per token: transform with a SharedVocabulary runs about 1.3-1.6x
+slower than with a plain dict.
+"""
+import threading
+from array import array
+from collections import OrderedDict
+
+from .model import load_pipeline
+from .serving import ModelHolder
+
+
+class VocabularyPool:
+    """Token strings shared by several vocabularies, each with a global id.
+
+    Ids are only ever appended, so a SharedVocabulary made earlier stays
+    valid; tokens are kept after the models using them are evicted, which
+    bounds the pool by the union of the vocabularies ever registered.
+    """
+    def __init__(self):
+        self.ids = {}
+        self.tokens = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def share(self, vocabulary):
+        """Return a SharedVocabulary with the same {token: index} as vocabulary."""
+        with self._lock:
+            ids = self.ids
+            tokens = self.tokens
+            for t in vocabulary:
+                if t not in ids:
+                    ids[t] = len(tokens)
+                    tokens.append(t)
+            local = array('i', [-1]) * len(tokens)
+        for t, idx in vocabulary.items():
+            local[ids[t]] = idx
+        return SharedVocabulary(self, local, len(vocabulary))
+
+
+class SharedVocabulary:
+    """Read-only {token: index} view over a VocabularyPool.
+
+    Supports what the vectorizers and model writers use from a dict (get,
+    [], in, len, iteration, items) and pickles as a plain dict, so a
+    pipeline saved from a registry does not drag the pool along.
+    """
+    __slots__ = ('pool', 'local', '_len')
+
+    def __init__(self, pool, local, length):
+        self.pool = pool
+        self.local = local
+        self._len = length
+
+    def get(self, token, default=None):
+        gid = self.pool.ids.get(token)
+        # tokens added to the pool after this vocabulary are past its end
+        if gid is None or gid >= len(self.local):
+            return default
+        idx = self.local[gid]
+        return default if idx < 0 else idx
+
+    def __getitem__(self, token):
+        idx = self.get(token)
+        if idx is None:
+            raise KeyError(token)
+        return idx
+
+    def __contains__(self, token):
+        return self.get(token) is not None
+
+    def __len__(self):
+        return self._len
+
+    def items(self):
+        tokens = self.pool.tokens
+        for gid, idx in enumerate(self.local):
+            if idx >= 0:
+                yield tokens[gid], idx
+
+    def keys(self):
+        return (t for t, _ in self.items())
+
+    def values(self):
+        return (idx for _, idx in self.items())
+
+    __iter__ = keys
+
+    def __reduce__(self):
+        return (dict, (dict(self.items()),))
+
+
+class ModelRegistry:
+    """Named pipelines, loaded on demand, at most max_resident at a time.
+
+    Each resident model is a ModelHolder, so it is reloaded when its file
+    changes. stats() reports per-model loads, load errors, evictions and
+    requests, including those of models that are no longer resident.
+    """
+    def __init__(self, paths=None, max_resident=4, pool=None):
+        self.paths = {}
+        self.max_resident = max_resident
+        self.pool = pool if pool is not None else VocabularyPool()
+        self._resident = OrderedDict()
+        self._stats = {}
+        self._lock = threading.Lock()
+        for name, path in (paths or {}).items():
+            self.add(name, path)
+
+    def add(self, name, path):
+        with self._lock:
+            self.paths[name] = path
+            self._stats.setdefault(name, {'loads': 0, 'load_errors': 0, 'evictions': 0, 'requests': 0})
+            holder = self._resident.pop(name, None)
+            if holder is not None:
+                self._retire(name, holder)
+
+    def __contains__(self, name):
+        return name in self.paths
+
+    def _load(self, path):
+        vec, clf = load_pipeline(path)
+        vocab = getattr(vec, 'vocabulary_', None)
+        # a CompactVocabulary is already flat; only dicts go into the pool
+        if isinstance(vocab, dict) and vocab:
+            vec.vocabulary_ = self.pool.share(vocab)
+        return vec, clf
+
+    def _retire(self, name, holder):
+        # keep the counters of a holder that is dropped
+        stats = self._stats[name]
+        stats['loads'] += holder.loads
+        stats['load_errors'] += holder.load_errors
+
+    def get(self, name):
+        """The ModelHolder for name, made resident if needed; KeyError if name is unknown."""
+        with self._lock:
+            path = self.paths[name]
+            self._stats[name]['requests'] += 1
+            holder = self._resident.get(name)
+            if holder is not None:
+                self._resident.move_to_end(name)
+            else:
+                holder = ModelHolder(path, loader=self._load)
+                self._resident[name] = holder
+            # also applies a max_resident lowered since the last call
+            while len(self._resident) > max(1, self.max_resident):
+                old, old_holder = self._resident.popitem(last=False)
+                self._retire(old, old_holder)
+                self._stats[old]['evictions'] += 1
+        return holder
+
+    def stats(self):
+        """{name: {'path', 'resident', 'loads', 'load_errors', 'evictions', 'requests'}}."""
+        with self._lock:
+            out = {}
+            for name, path in self.paths.items():
+                stats = dict(self._stats[name], path=path, resident=name in self._resident)
+                holder = self._resident.get(name)
+                if holder is not None:
+                    stats['loads'] += holder.loads
+                    stats['load_errors'] += holder.load_errors
+                out[name] = stats
+            return out
@@ -0,0 +1,276 @@
+"""Helpers shared by the long-running front ends (webapp.py and friends)."""
+import os
+import json
+import time
+import uuid
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:  # no flock (Windows): one job per process only
+    fcntl = None
+
+from .model import load_pipeline
+
+
+def _warm(pipeline):
+    # build the scoring tables before the pipeline is published, so the first
+    # request after a swap does not pay for it (and forked workers share them)
+    model = pipeline[1]
+    if model is not None:
+        model._get_compiled()
+
+
+def score_messages(vec, clf, messages):
+    """Score messages in one vectorized pass; returns [(label, {class: prob})] in order."""
+    labels, _, probs_rows = clf.predict_batch(vec.transform_csr(messages))
+    return [(str(label), {str(k): float(v) for k, v in probs.items()})
+            for label, probs in zip(labels, probs_rows)]
+
+
+class ModelHolder:
+    """Process-wide holder for one loaded (vectorizer, model) pipeline.
+
+    get() stats the model file and only reloads it when its identity
+    (inode, size, mtime) changed, so the file is read once rather than on
+    every request. The pair is replaced as a single tuple under a lock:
+    callers always get either the old or the new pipeline, never a mix.
+    generation increases on every swap so dependent caches can tell.
+    """
+    def __init__(self, path, loader=load_pipeline):
+        self.path = path
+        self.loader = loader
+        self.generation = 0
+        self.loads = 0
+        self.load_errors = 0
+        self._lock = threading.Lock()
+        # (vectorizer, model, generation), replaced as one object
+        self._current = (None, None, 0)
+        self._stamp = None
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _swap(self, pipeline, stamp):
+        self.generation += 1
+        self._current = (pipeline[0], pipeline[1], self.generation)
+        self._stamp = stamp
+
+    def get(self):
+        """Return the current (vectorizer, model), or (None, None) if there is no model file."""
+        return self.current()[:2]
+
+    def current(self):
+        """Like get(), but also return the generation the pair belongs to."""
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return self._current
+        with self._lock:
+            stamp = self._file_stamp()
+            if stamp == self._stamp:
+                return self._current
+            if stamp is None:
+                self._swap((None, None), None)
+                return self._current
+            try:
+                pipeline = self.loader(self.path)
+                _warm(pipeline)
+            except Exception:
+                # most likely caught the file mid-write; keep serving the old
+                # pipeline and try again on the next call
+                self.load_errors += 1
+                return self._current
+            self.loads += 1
+            self._swap(pipeline, stamp)
+            return self._current
+
+    def set(self, vectorizer, model):
+        """Install a pipeline that was just saved to path, without reading it back."""
+        _warm((vectorizer, model))
+        with self._lock:
+            self._swap((vectorizer, model), self._file_stamp())
+
+    def clear(self):
+        with self._lock:
+            self._swap((None, None), self._file_stamp())
+
+
+class TrainingJobs:
+    """Run training in a background thread, one job at a time.
+
+    start(func, *args) calls func(*args, progress=report) off the request
+    thread, where report(stage, fraction) updates the job's status. The
+    status of the latest job is mirrored to status_path (written to a temp
+    file and renamed), so every pre-forked worker can report it, not just
+    the one running the job. While a job runs it holds an flock on
+    status_path + '.lock', so pre-forked workers cannot start a second one.
+    """
+    def __init__(self, status_path=None):
+        self.status_path = status_path
+        self.lock_path = status_path + '.lock' if status_path is not None else None
+        self._lock = threading.Lock()
+        self._job = None
+        self._thread = None
+        self._lock_file = None
+
+    def _acquire(self):
+        # False when another process is running a job
+        if self.lock_path is None or fcntl is None:
+            return True
+        f = open(self.lock_path, 'a')
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self._lock_file = f
+        return True
+
+    def _release(self):
+        if self._lock_file is not None:
+            # closing the file drops the flock
+            self._lock_file.close()
+            self._lock_file = None
+
+    def start(self, func, *args):
+        """Start a job; returns (status, True), or (running job's status, False) if one is running."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return dict(self._job), False
+            if not self._acquire():
+                return self._read_status() or {'status': 'running'}, False
+            self._job = {
+                'id': uuid.uuid4().hex[:12],
+                'status': 'running',
+                'stage': 'queued',
+                'progress': 0.0,
+                'started': time.time(),
+                'finished': None,
+                'result': None,
+                'error': None,
+            }
+            self._publish()
+            self._thread = threading.Thread(target=self._run, args=(func, args), daemon=True)
+            self._thread.start()
+            return dict(self._job), True
+
+    def _run(self, func, args):
+        def report(stage, fraction):
+            self._update(stage=stage, progress=fraction)
+        try:
+            result = func(*args, progress=report)
+        except Exception as e:
+            self._update(status='failed', error=str(e) or type(e).__name__, finished=time.time())
+        else:
+            self._update(status='done', stage='done', progress=1.0, result=result, finished=time.time())
+        finally:
+            with self._lock:
+                self._release()
+
+    def _update(self, **fields):
+        with self._lock:
+            self._job.update(fields)
+            self._publish()
+
+    def _publish(self):
+        if self.status_path is None:
+            return
+        tmp = f'{self.status_path}.tmp{os.getpid()}'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._job, f)
+        os.replace(tmp, self.status_path)
+
+    def _read_status(self):
+        if self.status_path is not None:
+            try:
+                with open(self.status_path, encoding='utf-8') as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass
+        return None
+
+    def status(self):
+        """Status dict of the latest job (from any worker), or None."""
+        status = self._read_status()
+        if status is not None:
+            return status
+        with self._lock:
+            return dict(self._job) if self._job is not None else None
+
+    def forget(self):
+        """Drop the recorded status, e.g. one left behind by a previous run."""
+        with self._lock:
+            self._job = None
+            if self.status_path is not None and os.path.exists(self.status_path):
+                os.remove(self.status_path)
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-message requests into batched scoring calls.
+
+    submit() queues one message and waits for its result. A background task
+    takes the first queued message, keeps collecting until it has max_batch
+    messages or max_wait_ms have passed, then calls score_batch(messages)
+    once in a worker thread and hands each caller its own result. Must be
+    started from inside the running event loop.
+    """
+    def __init__(self, score_batch, max_batch=64, max_wait_ms=5.0):
+        self.score_batch = score_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches = 0
+        self.messages = 0
+        self._queue = None
+        self._task = None
+        self._executor = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        # one scoring thread: batches run back to back while the next fills up
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._task = asyncio.ensure_future(self._run())
+
+    async def submit(self, message):
+        fut = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((message, fut))
+        return await fut
+
+    async def _collect(self, loop):
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect(loop)
+            messages = [m for m, _ in batch]
+            try:
+                results = await loop.run_in_executor(self._executor, self.score_batch, messages)
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            self.batches += 1
+            self.messages += len(batch)
+            for (_, fut), result in zip(batch, results):
+                if not fut.done():
+                    fut.set_result(result)
@@ -0,0 +1,171 @@
+"""A read-only token -> index mapping stored as a few flat buffers.
+
+A dict vocabulary costs a str object, a dict entry and often an int object
+per token, and is pickled and unpickled token by token. CompactVocabulary
+keeps the same mapping in three buffers:
+
+- blob     the UTF-8 tokens in index order, concatenated
+- offsets  uint32 [n + 1]: token i is blob[offsets[i]:offsets[i + 1]]
+- slots    int32 open-addressing hash table over crc32 of the token
+           bytes, holding token indices (-1 for an empty slot)
+
+Since tokens are stored in index order, the slot hit is the index itself.
+to_bytes() concatenates the buffers behind a small header, so loading is
+a few memcpys rather than one insertion per token; from_bytes(copy=False)
+even reads offsets and slots straight out of a memory-mapped model file.
+"""
+import sys
+import struct
+from array import array
+from zlib import crc32
+
+# n_tokens, n_slots, blob length (little-endian uint32)
+_HEADER = struct.Struct('<III')
+_LITTLE = sys.byteorder == 'little'
+# at most this fraction of slots are used, so probe chains stay short
+_MAX_LOAD = 0.6
+
+
+def _le_bytes(arr):
+    # the little-endian bytes of an array (also used by modelfile)
+    if not _LITTLE:
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _le_view(buf, typecode):
+    # an array over little-endian bytes: a zero-copy cast where possible
+    if _LITTLE:
+        return buf.cast(typecode)
+    arr = array(typecode, buf.tobytes())
+    arr.byteswap()
+    return arr
+
+
+class CompactVocabulary:
+    """Dict-like {token: index} for the indices 0..n-1, built once and not modified.
+
+    Supports get, [], in, len, iteration, keys/values/items, plus
+    token(index) for the reverse lookup. Pickles as its to_bytes() form.
+    """
+    __slots__ = ('blob', 'offsets', 'slots')
+
+    def __init__(self, blob, offsets, slots):
+        self.blob = blob
+        self.offsets = offsets
+        self.slots = slots
+
+    @classmethod
+    def from_dict(cls, vocabulary):
+        """Build from a {token: index} mapping whose indices are exactly 0..n-1."""
+        tokens = sorted(vocabulary, key=vocabulary.__getitem__)
+        if [vocabulary[t] for t in tokens] != list(range(len(tokens))):
+            raise ValueError('vocabulary indices must be 0..n-1 to be stored compactly')
+        return cls.from_tokens(tokens)
+
+    @classmethod
+    def from_tokens(cls, tokens):
+        """Build from the tokens in index order."""
+        encoded = [t.encode('utf-8') for t in tokens]
+        offsets = array('I', [0])
+        pos = 0
+        for b in encoded:
+            pos += len(b)
+            offsets.append(pos)
+        n_slots = int(len(encoded) / _MAX_LOAD) + 1
+        slots = array('i', [-1]) * n_slots
+        for i, b in enumerate(encoded):
+            h = crc32(b) % n_slots
+            while slots[h] >= 0:
+                h = h + 1 if h + 1 < n_slots else 0
+            slots[h] = i
+        return cls(b''.join(encoded), offsets, slots)
+
+    @classmethod
+    def from_bytes(cls, buf, copy=True):
+        """Inverse of to_bytes().
+
+        With copy=False, offsets and slots are views into buf (which must
+        stay alive and unchanged), e.g. a memory-mapped file shared between
+        processes; otherwise they are copied and buf can be dropped.
+        """
+        view = memoryview(buf)
+        n, n_slots, blob_len = _HEADER.unpack_from(view)
+        start = _HEADER.size
+        offsets = _le_view(view[start:start + 4 * (n + 1)], 'I')
+        start += 4 * (n + 1)
+        slots = _le_view(view[start:start + 4 * n_slots], 'i')
+        start += 4 * n_slots
+        if copy:
+            # from the raw bytes: one memcpy instead of an element-wise copy
+            offsets = array('I', offsets.tobytes())
+            slots = array('i', slots.tobytes())
+        # bytes, not a view: lookups compare with bytes.startswith
+        blob = bytes(view[start:start + blob_len])
+        return cls(blob, offsets, slots)
+
+    def to_bytes(self):
+        return b''.join([
+            _HEADER.pack(len(self.offsets) - 1, len(self.slots), len(self.blob)),
+            _le_bytes(array('I', self.offsets)),
+            _le_bytes(array('i', self.slots)),
+            self.blob,
+        ])
+
+    def __reduce__(self):
+        return (self.__class__.from_bytes, (self.to_bytes(),))
+
+    def get(self, token, default=None):
+        b = token.encode('utf-8')
+        n = len(b)
+        blob = self.blob
+        offsets = self.offsets
+        slots = self.slots
+        n_slots = len(slots)
+        h = crc32(b) % n_slots
+        while True:
+            i = slots[h]
+            if i < 0:
+                return default
+            start = offsets[i]
+            if offsets[i + 1] - start == n and blob.startswith(b, start):
+                return i
+            h = h + 1 if h + 1 < n_slots else 0
+
+    def __getitem__(self, token):
+        i = self.get(token)
+        if i is None:
+            raise KeyError(token)
+        return i
+
+    def __contains__(self, token):
+        return self.get(token) is not None
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def token(self, index):
+        """The token with the given index."""
+        return self.blob[self.offsets[index]:self.offsets[index + 1]].decode('utf-8')
+
+    def keys(self):
+        blob = self.blob
+        offsets = self.offsets
+        for i in range(len(offsets) - 1):
+            yield blob[offsets[i]:offsets[i + 1]].decode('utf-8')
+
+    __iter__ = keys
+
+    def values(self):
+        return iter(range(len(self)))
+
+    def items(self):
+        return zip(self.keys(), range(len(self)))
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def nbytes(self):
+        """Bytes held by the three buffers."""
+        return len(self.blob) + 4 * len(self.offsets) + 4 * len(self.slots)
@@ -0,0 +1,63 @@
+import json
+import time
+import argparse
+from train import load_csv
+from sms_spam_detector.model import SimpleCountVectorizer, HashingVectorizer
+from sms_spam_detector.evaluation import CrossValidation, sweep
+
+
+def fmt(value):
+    return '-' if value is None else f'{value:.3f}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cross-validated grid search over alpha and min_df from one counting pass')
+    parser.add_argument('--data', default='data/sms_sample_20.csv')
+    parser.add_argument('--n', type=int, default=20, help='number of samples to use from the dataset (0 for all)')
+    parser.add_argument('--k', type=int, default=5, help='cross-validation folds')
+    parser.add_argument('--alphas', type=float, nargs='+', default=[0.01, 0.1, 0.5, 1.0, 2.0])
+    parser.add_argument('--min-dfs', type=int, nargs='+', default=[1, 2, 3, 5])
+    parser.add_argument('--hash-bits', type=int, default=None, help='sweep a HashingVectorizer (min_df does not apply)')
+    parser.add_argument('--ngram-range', type=int, nargs=2, default=(1, 1), metavar=('MIN_N', 'MAX_N'))
+    parser.add_argument('--analyzer', choices=['word', 'char_wb'], default='word')
+    parser.add_argument('--metric', choices=['accuracy', 'f1', 'precision', 'recall'], default='f1',
+                        help='validation score to rank by; ties go to the smaller model')
+    parser.add_argument('--positive', default='spam')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--n-jobs', type=int, default=-1, help='processes to evaluate the grid with (-1 for all cores)')
+    parser.add_argument('--top', type=int, default=0, help='only print the best TOP settings')
+    parser.add_argument('--output', help='also write every report as JSON here')
+    args = parser.parse_args()
+
+    features = {'ngram_range': tuple(args.ngram_range), 'analyzer': args.analyzer}
+    if args.hash_bits:
+        vec = HashingVectorizer(n_bits=args.hash_bits, **features)
+        min_dfs = [1]
+    else:
+        vec = SimpleCountVectorizer(**features)
+        min_dfs = args.min_dfs
+
+    texts, labels = load_csv(args.data, n_samples=args.n)
+    t0 = time.perf_counter()
+    cv = CrossValidation(texts, labels, k=args.k, vectorizer=vec, seed=args.seed)
+    reports = sweep(cv, args.alphas, min_dfs, positive=args.positive, n_jobs=args.n_jobs)
+    elapsed = time.perf_counter() - t0
+
+    def rank_key(r):
+        score = r[args.metric]
+        return (-(score if score is not None else -1.0), r['size_bytes'], r['alpha'])
+
+    ranked = sorted(reports, key=rank_key)
+    shown = ranked[:args.top] if args.top else ranked
+    print(f"{args.k}-fold CV on {len(texts)} samples, {len(reports)} settings in {elapsed:.2f}s, ranked by {args.metric}")
+    print(f"{'rank':>4s} {'alpha':>8s} {'min_df':>6s} {'accuracy':>9s} {'precision':>10s} {'recall':>7s} "
+          f"{'f1':>6s} {'features':>9s} {'size':>10s}")
+    for i, r in enumerate(shown, 1):
+        print(f"{i:4d} {r['alpha']:8g} {r['min_df']:6d} {fmt(r['accuracy']):>9s} {fmt(r['precision']):>10s} "
+              f"{fmt(r['recall']):>7s} {fmt(r['f1']):>6s} {r['n_features']:9d} {r['size_bytes']:10d}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(ranked, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -1,71 +1,117 @@
-import csv
-import argparse
-from sms_spam_detector.model import SimpleCountVectorizer, MultinomialNB, save_pipeline
-
-
-def load_csv(path, n_samples=None):
-    texts = []
-    labels = []
-    with open(path, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for i, row in enumerate(reader):
-            if n_samples and i >= n_samples:
-                break
-            labels.append(row['label'])
-            texts.append(row['text'])
-    return texts, labels
-
-
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument('--data', default='data/sms_sample_20.csv')
-    parser.add_argument('--model', default='model.pkl')
-    parser.add_argument('--n', type=int, default=20, help='number of samples to use from the dataset')
-    args = parser.parse_args()
-
-    texts, labels = load_csv(args.data, n_samples=args.n)
-    vec = SimpleCountVectorizer(min_df=1)
-    X = vec.fit_transform(texts)
-    clf = MultinomialNB(alpha=1.0)
-    clf.fit(X, labels)
-    save_pipeline(args.model, vec, clf)
-    print(f"Trained on {len(texts)} samples. Model saved to {args.model}")
-
-
-if __name__ == '__main__':
-    main()
-import csv
-import argparse
-from sms_spam_detector.model import SimpleCountVectorizer, MultinomialNB, save_pipeline
-
-
-def load_csv(path, n_samples=None):
-    texts = []
-    labels = []
-    with open(path, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for i, row in enumerate(reader):
-            if n_samples and i >= n_samples:
-                break
-            labels.append(row['label'])
-            texts.append(row['text'])
-    return texts, labels
-
-
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument('--data', default='data/sms_sample_20.csv')
-    parser.add_argument('--model', default='model.pkl')
-    parser.add_argument('--n', type=int, default=20, help='number of samples to use from the dataset')
-    args = parser.parse_args()
-
-    texts, labels = load_csv(args.data, n_samples=args.n)
-    vec = SimpleCountVectorizer(min_df=1)
-    X = vec.fit_transform(texts)
-    clf = MultinomialNB(alpha=1.0)
-    clf.fit(X, labels)
-    save_pipeline(args.model, vec, clf)
-    print(f"Trained on {len(texts)} samples. Model saved to {args.model}")
-
-if __name__ == '__main__':
-    main()
+import csv
+import sys
+import argparse
+from sms_spam_detector.model import SimpleCountVectorizer, HashingVectorizer, MultinomialNB, save_pipeline, load_pipeline
+from sms_spam_detector.vocabulary import CompactVocabulary
+
+
+def load_csv(path, n_samples=None):
+    texts = []
+    labels = []
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        for i, row in enumerate(reader):
+            if n_samples and i >= n_samples:
+                break
+            labels.append(row['label'])
+            texts.append(row['text'])
+    return texts, labels
+
+
+def iter_csv_chunks(path, chunk_size=10000, n_samples=None):
+    """Yield (texts, labels) batches of at most chunk_size rows.
+
+    Only one batch is held in memory at a time, so arbitrarily large CSV
+    files can be streamed into partial_fit.
+    """
+    texts = []
+    labels = []
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        for i, row in enumerate(reader):
+            if n_samples and i >= n_samples:
+                break
+            labels.append(row['label'])
+            texts.append(row['text'])
+            if len(texts) >= chunk_size:
+                yield texts, labels
+                texts = []
+                labels = []
+    if texts:
+        yield texts, labels
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--data', default='data/sms_sample_20.csv')
+    parser.add_argument('--model', default='model.pkl')
+    parser.add_argument('--n', type=int, default=20, help='number of samples to use from the dataset')
+    parser.add_argument('--hash-bits', type=int, default=None,
+                        help='use a HashingVectorizer with 2**HASH_BITS buckets instead of a stored vocabulary')
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help='stream the CSV in batches of CHUNK_SIZE rows with partial_fit (bounded memory)')
+    parser.add_argument('--update', action='store_true',
+                        help='fold the data into the existing model at --model instead of training from scratch')
+    parser.add_argument('--n-jobs', type=int, default=None,
+                        help='processes used to vectorize and count (-1 for all cores)')
+    parser.add_argument('--format', choices=['pickle', 'binary'], default='pickle',
+                        help='model file format; binary files are memory-mapped on load')
+    parser.add_argument('--ngram-range', type=int, nargs=2, default=(1, 1), metavar=('MIN_N', 'MAX_N'),
+                        help='n-gram sizes to use as features, e.g. 1 2 for unigrams and bigrams')
+    parser.add_argument('--analyzer', choices=['word', 'char_wb'], default='word',
+                        help='char_wb: character n-grams within each word, robust to obfuscated spelling')
+    parser.add_argument('--min-df', type=int, default=1, help='drop features seen in fewer documents')
+    parser.add_argument('--max-features', type=int, default=None, help='keep only the most frequent features')
+    parser.add_argument('--keep-pending', action='store_true',
+                        help='also save the counts of features below --min-df, so a later --update can promote them')
+    parser.add_argument('--compact-vocab', action='store_true',
+                        help='store the vocabulary as flat buffers instead of a dict (smaller, faster to load)')
+    args = parser.parse_args()
+    if args.compact_vocab and args.hash_bits:
+        parser.error('--compact-vocab needs a vocabulary; --hash-bits models have none')
+
+    if args.update:
+        vec, clf = load_pipeline(args.model)
+        # keep an updated model in the form it was saved in
+        args.compact_vocab = args.compact_vocab or isinstance(getattr(vec, 'vocabulary_', None), CompactVocabulary)
+    else:
+        features = {'ngram_range': tuple(args.ngram_range), 'analyzer': args.analyzer}
+        if args.hash_bits:
+            vec = HashingVectorizer(n_bits=args.hash_bits, **features)
+        else:
+            vec = SimpleCountVectorizer(min_df=args.min_df, max_features=args.max_features,
+                                        keep_pending=args.keep_pending, **features)
+        clf = MultinomialNB(alpha=1.0)
+    vec.n_jobs = args.n_jobs
+    clf.n_jobs = args.n_jobs
+
+    if args.chunk_size or args.update:
+        chunks = lambda: iter_csv_chunks(args.data, args.chunk_size or 10000, n_samples=args.n)
+        capped = isinstance(vec, SimpleCountVectorizer) and (vec.min_df > 1 or vec.max_features is not None)
+        # with min_df/max_features a one-pass vocabulary differs from batch training
+        # (see partial_fit); from scratch, a first pass over the file fixes the vocabulary
+        two_pass = capped and not args.update
+        if two_pass:
+            vec.fit_stream(texts for texts, _ in chunks())
+        elif capped:
+            print('warning: --update with min_df > 1 or max_features only counts a new token from the '
+                  'batch it enters the vocabulary in; the model differs from retraining from scratch',
+                  file=sys.stderr)
+        count = 0
+        for texts, labels in chunks():
+            if not two_pass:
+                vec.partial_fit(texts)
+            clf.partial_fit(vec.transform(texts), labels)
+            count += len(texts)
+    else:
+        texts, labels = load_csv(args.data, n_samples=args.n)
+        X = vec.fit_transform(texts)
+        clf.fit(X, labels)
+        count = len(texts)
+    if args.compact_vocab:
+        vec.compact_vocabulary()
+    save_pipeline(args.model, vec, clf, format=args.format)
+    print(f"Trained on {count} samples. Model saved to {args.model}")
+
+if __name__ == '__main__':
+    main()